@@ -1,22 +1,25 @@
-import os
+import operator
+import subprocess
+from functools import cache, lru_cache, reduce
 from langgraph.graph import StateGraph, START, END
-from langchain_openai import ChatOpenAI
-from tools import run_command, read_file, write_file, query_vector_store
+from tools import run_command, read_file, write_file, query_vector_store, query_vector_store_batch
 from typing import Literal
 from langgraph.prebuilt import ToolNode
 from agents.docu_cat_state import DocuCatState
-from langchain_core.messages import SystemMessage
+from agents.llm_client import get_llm_with_tools
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
 from langchain_core.prompts import PromptTemplate
 
 
-system_prompt_template = PromptTemplate.from_template("""
+system_prompt = """
 You are an expert technical writer who is responsible for updating documentation and code comments based on code changes.
 
 <instructions>
 You should follow the steps below to complete your task:
 
 1. ANALYZE CODE CHANGES:
-   - Use run_command to inspect what changed in each file (e.g., git diff)
+   - Read the diff of the changed files if it is provided in the <diff> section
+   - Use run_command to inspect what changed in each file (e.g., git diff) when the diff is not provided or truncated
    - Determine the intent and purpose of the changes
    - Identify what features/functionality were added/modified
 
@@ -26,6 +29,7 @@ You should follow the steps below to complete your task:
      * README.md - If project structure, features, or usage changed
      * Other .md files as needed
    - You must call the tool query_vector_store to search the local vector store for relevant documentation files and code files, if you are provided with the tool. If you found any comments need updates in code files, you must update the comments.
+   - When you have several topics to search for, use query_vector_store_batch to search for all of them in a single call.
 
 3. UPDATE DOCUMENTS:
    For each document or code file that needs updates:
@@ -46,19 +50,168 @@ You should follow the steps below to complete your task:
 - Focus on updating, removing or completing the documentation and code comments that are related to the changes, instead of adding new documentation and code comments.
 </requirements>
 
+<notes>
+- Remember to use the repository path as the working_dir when using any tools.
+</notes>
+"""
+
+# The system prompt is static so that it can be served from the prompt cache
+# on every turn. Anything that depends on the state goes into the task prompt.
+system_message = SystemMessage(content=[
+    {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}
+])
+
+task_prompt_template = PromptTemplate.from_template("""
 <information>
 Repository path: {repo_path}
 Changed files:
 {files_list}
 </information>
-
-<notes>
-- Remember to use the repository path as the working_dir when using any tools.
-</notes>
-
+{diff_section}
 Begin your analysis and document updates now.
 """)
 
+# Maximum size of the diff prefetched into the task prompt
+MAX_DIFF_CHARS = 20000
+
+def resolve_revisions(repo_path: str, revisions: tuple[str, str]) -> tuple[str, str] | None:
+    """
+    Resolve the base and head revisions to commit SHAs with a single git call.
+
+    Args:
+        repo_path: Path to the repository
+        revisions: Base and head revisions, such as branch names or HEAD~N
+
+    Returns:
+        tuple: (base SHA, head SHA), or None if a revision cannot be resolved
+    """
+    result = subprocess.run(
+        ['git', 'rev-parse'] + [f"{revision}^{{commit}}" for revision in revisions],
+        cwd=repo_path,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        return None
+
+    base_sha, head_sha = result.stdout.split()
+    return base_sha, head_sha
+
+def get_diff(repo_path: str, revisions: tuple[str, str], changed_files: tuple[str, ...]) -> str | None:
+    """
+    Get the diff of the changed files between two revisions.
+
+    The revisions are resolved to SHAs on every call, so a revision such as
+    HEAD~1 that points elsewhere after a new commit never returns a stale diff.
+    Callers that already have the SHAs use get_diff_between_commits directly.
+
+    Args:
+        repo_path: Path to the repository
+        revisions: Base and head revisions to compare
+        changed_files: Changed file paths as a hashable tuple
+
+    Returns:
+        The diff, truncated to MAX_DIFF_CHARS, or None if it is not available
+    """
+    if not changed_files:
+        return None
+
+    shas = resolve_revisions(repo_path, revisions)
+    if not shas:
+        return None
+
+    return get_diff_between_commits(repo_path, *shas, changed_files)
+
+@lru_cache(maxsize=32)
+def get_diff_between_commits(repo_path: str, base_sha: str, head_sha: str, changed_files: tuple[str, ...]) -> str | None:
+    """
+    Get the diff of the changed files between two commits with a single git call.
+
+    The diff is put in the task prompt so that the agent does not have to
+    request it file by file with run_command. The commits are compared from
+    their merge base, like the files of a pull request on GitHub. The result is
+    cached because commits never change.
+
+    Args:
+        repo_path: Path to the repository
+        base_sha: SHA of the base commit, or a revision pinned to a SHA such as <sha>~N
+        head_sha: SHA of the head commit
+        changed_files: Changed file paths as a hashable tuple
+
+    Returns:
+        The diff, truncated to MAX_DIFF_CHARS, or None if it is not available
+    """
+    if not changed_files:
+        return None
+
+    result = subprocess.run(
+        ['git', 'diff', f"{base_sha}...{head_sha}", '--'] + list(changed_files),
+        cwd=repo_path,
+        capture_output=True
+    )
+    if result.returncode != 0 or not result.stdout:
+        return None
+
+    diff = result.stdout.decode('utf-8', errors='replace')
+    if len(diff) > MAX_DIFF_CHARS:
+        diff = diff[:MAX_DIFF_CHARS] + "\n... (diff truncated, use run_command to see the rest)"
+    return diff
+
+@lru_cache(maxsize=128)
+def render_task_prompt(repo_path: str, changed_files: tuple[str, ...], diff: str | None = None) -> str:
+    """
+    Render the task prompt for a repository and its changed files.
+
+    The result is cached because the agent renders the same prompt on every
+    turn of the tool-calling loop.
+
+    Args:
+        repo_path: Path to the repository
+        changed_files: Changed file paths as a hashable tuple
+        diff: Diff of the changed files, if available
+
+    Returns:
+        The rendered task prompt
+    """
+    files_list = "- " + "\n- ".join(changed_files) if changed_files else ""
+    diff_section = f"\n<diff>\n{diff}\n</diff>\n" if diff else ""
+    return task_prompt_template.format(repo_path=repo_path, files_list=files_list, diff_section=diff_section)
+
+# Tool outputs older than the last few agent turns are cut down to their head
+# and tail, so that large diffs and files are not resent on every turn
+MAX_TOOL_OUTPUT_CHARS = 4000
+FULL_TOOL_OUTPUT_TURNS = 2
+
+def compact_messages(messages: list) -> list:
+    """
+    Truncate long tool outputs from older turns of the conversation.
+
+    The outputs of the last FULL_TOOL_OUTPUT_TURNS agent turns are kept in
+    full, so the agent can still write back a file it has just read.
+
+    Args:
+        messages: Conversation messages from the state
+
+    Returns:
+        Messages to send to the LLM
+    """
+    ai_indexes = [i for i, message in enumerate(messages) if isinstance(message, AIMessage)]
+    if len(ai_indexes) < FULL_TOOL_OUTPUT_TURNS:
+        return messages
+    keep_from = ai_indexes[-FULL_TOOL_OUTPUT_TURNS]
+
+    compacted = []
+    for i, message in enumerate(messages):
+        content = message.content
+        if i < keep_from and isinstance(message, ToolMessage) and isinstance(content, str) and len(content) > MAX_TOOL_OUTPUT_CHARS:
+            half = MAX_TOOL_OUTPUT_CHARS // 2
+            truncated = len(content) - 2 * half
+            message = message.model_copy(update={
+                "content": f"{content[:half]}\n... ({truncated} characters truncated) ...\n{content[-half:]}"
+            })
+        compacted.append(message)
+    return compacted
+
 def create_agent_node(llm_with_tools):
     """
     Create the agent node that calls the LLM with tools.
@@ -69,11 +222,28 @@ def create_agent_node(llm_with_tools):
     Returns:
         Function that processes the state and calls the LLM
     """
-    def agent(state: DocuCatState) -> DocuCatState:
-        """Call the LLM to analyze or use tools."""
+    def agent(state: DocuCatState) -> dict:
+        """Call the LLM to analyze or use tools. Only the new message is returned."""
         messages = state.get("messages", [])
-        response = llm_with_tools.invoke([SystemMessage(content=system_prompt_template.format(repo_path=state.get("repo_path"), files_list=state.get("changed_files")))] + messages)
-        print(f"💬 {response.content}")
+        repo_path = state.get("repo_path")
+        changed_files = tuple(state.get("changed_files") or ())
+        # The nodes listing the changed files record the SHAs they compared, so
+        # the revisions only need resolving when the state has none
+        if state.get("base_sha") and state.get("head_sha"):
+            diff = get_diff_between_commits(repo_path, state.get("base_sha"), state.get("head_sha"), changed_files)
+        else:
+            diff = get_diff(repo_path, (f"HEAD~{state.get('commit_count', 1)}", "HEAD"), changed_files)
+        task_message = HumanMessage(content=render_task_prompt(repo_path, changed_files, diff))
+        # Stream the response so that it is printed while it is being generated
+        prompt = [system_message, task_message] + compact_messages(messages)
+        chunks = []
+        print("💬 ", end="", flush=True)
+        for chunk in llm_with_tools.stream(prompt):
+            chunks.append(chunk)
+            print(chunk.content, end="", flush=True)
+        print()
+        # Some providers end the stream without any chunk, so ask again without streaming
+        response = reduce(operator.add, chunks) if chunks else llm_with_tools.invoke(prompt)
         return {"messages": [response]}
 
     return agent
@@ -91,41 +261,30 @@ def should_continue(state: DocuCatState) -> Literal["tools", "end"]:
     messages = state.get("messages", [])
     last_message = messages[-1] if messages else None
 
-    # If the last message has tool calls, continue to tools node
-    if last_message and hasattr(last_message, "tool_calls") and last_message.tool_calls:
-        return "tools"
-
-    # Otherwise, we're done
-    return "end"
+    # If the last message has tool calls, continue to tools node. Otherwise, we're done
+    return "tools" if getattr(last_message, "tool_calls", None) else "end"
 
+@cache
 def create_workflow(with_embedding: bool = True) -> StateGraph:
     """
     Create the LangGraph workflow for analyzing changes with tool support.
 
+    The compiled workflow is memoized, so every caller asking for the same
+    variant shares one instance.
+
+    Args:
+        with_embedding: Whether to give the agent the vector store query tools
+
     Returns:
         Compiled StateGraph workflow
     """
-    # Get API key from environment
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        raise ValueError("OPENROUTER_API_KEY not set. Cannot create workflow.")
-
-    # Initialize ChatOpenAI with OpenRouter
-    llm = ChatOpenAI(
-        model="anthropic/claude-haiku-4.5",
-        openai_api_key=api_key,
-        openai_api_base="https://openrouter.ai/api/v1",
-        max_tokens=4096,
-        temperature=0.7,
-    )
-
     # Create tools list - always include base tools
     tools = [run_command, read_file, write_file]
     if with_embedding:
-        tools.append(query_vector_store)
+        tools.extend([query_vector_store, query_vector_store_batch])
 
-    # Bind tools to LLM
-    llm_with_tools = llm.bind_tools(tools)
+    # Bind tools to the shared LLM
+    llm_with_tools = get_llm_with_tools(tuple(tool.name for tool in tools))
 
     # Create the graph
     workflow = StateGraph(DocuCatState)
@@ -154,4 +313,3 @@ def create_workflow(with_embedding: bool = True) -> StateGraph:
     return workflow.compile()
 
 agent_docu_cat = create_workflow(with_embedding=True)
-agent_docu_cat_no_embedding = create_workflow(with_embedding=False)
@@ -1,7 +1,10 @@
+from langchain_core.messages import AIMessage
 from langgraph.graph import StateGraph, START, END
 from agents.docu_cat_state import DocuCatState
 from agents.nodes import commit_and_push_changes, get_changed_files_github, post_comment_to_pr, read_pr_configuration
 from agents.docu_cat import agent_docu_cat
+from agents.utils import has_code_changes
+from functools import cache
 
 
 def should_run_docu_cat(state: DocuCatState) -> bool:
@@ -10,11 +13,33 @@ def should_run_docu_cat(state: DocuCatState) -> bool:
     """
     return state.get("config", {}).get("enabled", False)
 
-def should_run_docu_cat_agent(state: DocuCatState) -> bool:
+def should_run_docu_cat_agent(state: DocuCatState) -> str:
     """
-    Determine if DocuCat agent should be run based on the configuration.
+    Determine if DocuCat agent should be run based on the configuration and the changed files.
+
+    Returns:
+        "agent" to analyze the changes, "skip_documentation_only_changes" if only documents changed, or END
+    """
+    changed_files = state.get("changed_files") or []
+    if not should_run_docu_cat(state) or not changed_files:
+        return END
+    if not has_code_changes(changed_files):
+        return "skip_documentation_only_changes"
+    return "agent"
+
+def skip_documentation_only_changes(state: DocuCatState):
+    """
+    Record that no documentation updates are needed when only documents changed,
+    so the PR comment still reports the result without running the agent.
     """
-    return len(state.get("changed_files", [])) > 0
+    print("ℹ️  Only documentation files changed. Skipping the analysis.")
+    return {"messages": [AIMessage(content="Only documentation files changed, so there is no code change to document.\n\nNO_UPDATES_NEEDED")]}
+
+def wait_for_pr_information(state: DocuCatState):
+    """
+    Join the configuration and changed files branches, which run concurrently.
+    """
+    return None
 
 def should_commit_and_push_changes(state: DocuCatState) -> bool:
     """
@@ -22,11 +47,13 @@ def should_commit_and_push_changes(state: DocuCatState) -> bool:
     """
     return state.get("config", {}).get("shouldCreateCommits", False)
 
+@cache
 def create_workflow() -> StateGraph:
     """
-    Create the LangGraph workflow for running DocuCat locally.
+    Create the LangGraph workflow for running DocuCat as a GitHub Action.
+
+    The compiled workflow is memoized, so it is only built once per process.
 
-    Args:
     Returns:
         Compiled StateGraph workflow
     """
@@ -36,20 +63,23 @@ def create_workflow() -> StateGraph:
     # Add nodes
     workflow.add_node("read_pr_configuration", read_pr_configuration)
     workflow.add_node("get_changed_files_github", get_changed_files_github)
+    workflow.add_node("wait_for_pr_information", wait_for_pr_information)
+    workflow.add_node("skip_documentation_only_changes", skip_documentation_only_changes)
     workflow.add_node("agent", agent_docu_cat)
     workflow.add_node("commit_and_push_changes", commit_and_push_changes)
     workflow.add_node("post_comment_to_pr", post_comment_to_pr)
 
-    # Add edges
+    # Add edges. The configuration is parsed by an LLM and the changed files come from
+    # the GitHub API, so both are fetched concurrently before deciding whether to run
     workflow.add_edge(START, "read_pr_configuration")
-    workflow.add_conditional_edges("read_pr_configuration", should_run_docu_cat, {
-        True: "get_changed_files_github",
-        False: END,
-    })
-    workflow.add_conditional_edges("get_changed_files_github", should_run_docu_cat_agent, {
-        True: "agent",
-        False: END,
+    workflow.add_edge(START, "get_changed_files_github")
+    workflow.add_edge(["read_pr_configuration", "get_changed_files_github"], "wait_for_pr_information")
+    workflow.add_conditional_edges("wait_for_pr_information", should_run_docu_cat_agent, {
+        "agent": "agent",
+        "skip_documentation_only_changes": "skip_documentation_only_changes",
+        END: END,
     })
+    workflow.add_edge("skip_documentation_only_changes", "post_comment_to_pr")
     workflow.add_conditional_edges("agent", should_commit_and_push_changes, {
         True: "commit_and_push_changes",
         False: "post_comment_to_pr",
@@ -1,37 +1,34 @@
 from langgraph.graph import StateGraph, START, END
 from agents.docu_cat_state import DocuCatState
 from agents.nodes import get_recent_commits_files, validate_repository
-from agents.docu_cat import agent_docu_cat, agent_docu_cat_no_embedding
-from pathlib import Path
+from agents.docu_cat import create_workflow as create_docu_cat_workflow
+from agents.utils import has_code_changes
+from functools import cache
 
 
-def validate_repository(state: DocuCatState) -> bool:
+def should_run_agent(state: DocuCatState) -> bool:
     """
-    Validate that the path is a git repository.
-
-    Returns:
-        bool: True if valid git repository
+    Determine if the agent should be run based on the changed files.
     """
-    repo_path = state.get("repo_path", ".")
-    repo_path = Path(repo_path).resolve()
-
-    if not repo_path.exists():
-        return True
-
-    if not repo_path.is_dir():
+    changed_files = state.get("changed_files") or []
+    if not changed_files:
         return False
-
-    git_dir = repo_path / '.git'
-    if not git_dir.exists():
+    if not has_code_changes(changed_files):
+        print("ℹ️  Only documentation files changed. Skipping the analysis.")
         return False
-
     return True
 
+@cache
 def create_workflow(with_embedding: bool = True) -> StateGraph:
     """
     Create the LangGraph workflow for running DocuCat locally.
 
+    The compiled workflow is memoized, so every caller asking for the same
+    variant shares one instance.
+
     Args:
+        with_embedding: Whether to give the agent the query_vector_store tool
+
     Returns:
         Compiled StateGraph workflow
     """
@@ -40,17 +37,19 @@ def create_workflow(with_embedding: bool = True) -> StateGraph:
 
     # Add nodes
     workflow.add_node("get_recent_commits_files", get_recent_commits_files)
-    workflow.add_node("agent", agent_docu_cat if with_embedding else agent_docu_cat_no_embedding)
+    workflow.add_node("agent", create_docu_cat_workflow(with_embedding=with_embedding))
 
     # Add edges
     workflow.add_conditional_edges(START, validate_repository, {
         True: "get_recent_commits_files",
         False: END,
     })
-    workflow.add_edge("get_recent_commits_files", "agent")
+    workflow.add_conditional_edges("get_recent_commits_files", should_run_agent, {
+        True: "agent",
+        False: END,
+    })
 
     # Compile the graph
     return workflow.compile()
 
 agent_docu_cat_local = create_workflow(with_embedding=True)
-agent_docu_cat_local_no_embedding = create_workflow(with_embedding=False)
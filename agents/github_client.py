@@ -0,0 +1,39 @@
+import httpx
+from functools import cache
+
+
+# Base URL of the GitHub REST API
+GITHUB_API_URL = "https://api.github.com"
+
+# Seconds to wait for a response from the GitHub API before giving up on a request
+GITHUB_TIMEOUT_SECONDS = 30
+
+# Number of idle connections to the GitHub API kept open for reuse
+GITHUB_KEEPALIVE_CONNECTIONS = 8
+
+@cache
+def get_github_client(token: str) -> httpx.Client:
+    """
+    Get the HTTP client for the GitHub API shared by every node.
+
+    The client keeps a pool of keep-alive connections that is safe to use from
+    several threads, so the changed files pages and the PR comment all reuse
+    the connections opened by the first request instead of paying for a TLS
+    handshake each.
+
+    Args:
+        token: GitHub API token
+
+    Returns:
+        httpx client authenticated for the GitHub API
+    """
+    return httpx.Client(
+        base_url=GITHUB_API_URL,
+        headers={
+            'Authorization': f'token {token}',
+            'Accept': 'application/vnd.github.v3+json',
+            'User-Agent': 'DocuCat-Action'
+        },
+        timeout=GITHUB_TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_keepalive_connections=GITHUB_KEEPALIVE_CONNECTIONS)
+    )
@@ -0,0 +1,71 @@
+import os
+import httpx
+from functools import cache
+from langchain_openai import ChatOpenAI
+from tools import run_command, read_file, write_file, query_vector_store, query_vector_store_batch
+
+
+# Tools that can be bound to the LLM, by name
+TOOL_REGISTRY = {tool.name: tool for tool in [run_command, read_file, write_file, query_vector_store, query_vector_store_batch]}
+
+
+# Seconds to wait for a response from OpenRouter before giving up on a request
+LLM_TIMEOUT_SECONDS = 120
+
+@cache
+def get_http_client() -> httpx.Client:
+    """
+    Get the HTTP client shared by every ChatOpenAI instance.
+
+    Sharing one client keeps the connection to OpenRouter alive, so only
+    the first LLM call of the process pays for the TLS handshake.
+
+    Returns:
+        httpx client with a keep-alive connection pool
+    """
+    return httpx.Client(limits=httpx.Limits(max_keepalive_connections=8))
+
+@cache
+def get_llm(max_tokens: int = 4096, temperature: float = 0.7) -> ChatOpenAI:
+    """
+    Get an LLM client configured for OpenRouter.
+
+    Clients are created once per process and configuration, so the API key
+    is read and validated once, and every caller shares the connection pool
+    to OpenRouter.
+
+    Args:
+        max_tokens: Maximum number of tokens to generate
+        temperature: Sampling temperature
+
+    Returns:
+        ChatOpenAI client configured for OpenRouter
+    """
+    # Get API key from environment
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        raise ValueError("OPENROUTER_API_KEY not set. Cannot create workflow.")
+
+    # Initialize ChatOpenAI with OpenRouter
+    return ChatOpenAI(
+        model="anthropic/claude-haiku-4.5",
+        openai_api_key=api_key,
+        openai_api_base="https://openrouter.ai/api/v1",
+        max_tokens=max_tokens,
+        temperature=temperature,
+        timeout=LLM_TIMEOUT_SECONDS,
+        http_client=get_http_client(),
+    )
+
+@cache
+def get_llm_with_tools(tool_names: tuple[str, ...]):
+    """
+    Get the shared LLM with the given tools bound.
+
+    Args:
+        tool_names: Names of the tools to bind, as keys of TOOL_REGISTRY
+
+    Returns:
+        The LLM with tools bound
+    """
+    return get_llm().bind_tools([TOOL_REGISTRY[name] for name in tool_names])
@@ -1,35 +1,22 @@
+import os
 import subprocess
 import sys
 from agents.docu_cat_state import DocuCatState
+from agents.utils import getResultFromState, print_banner
 
 
-def configure_git(working_dir: str = None):
-    """
-    Configure git user for commits.
-    Uses GitHub Actions bot identity.
+# Identity of the commits created by the agent, passed to git with -c so
+# that the repository configuration is left untouched
+GIT_USER_NAME = "DocuCat"
+GIT_USER_EMAIL = "docu-cat@users.noreply.github.com"
 
-    Args:
-        working_dir: Directory to run git commands in (defaults to current directory)
-    """
-    try:
-        subprocess.run(
-            ['git', 'config', 'user.name', 'DocuCat'],
-            cwd=working_dir,
-            check=True,
-            capture_output=True
-        )
-        subprocess.run(
-            ['git', 'config', 'user.email', 'docu-cat@users.noreply.github.com'],
-            cwd=working_dir,
-            check=True,
-            capture_output=True
-        )
-        print("✓ Git user configured")
-    except subprocess.CalledProcessError as e:
-        print(f"Error configuring git: {e}", file=sys.stderr)
-        if e.stderr:
-            print(f"stderr: {e.stderr.decode()}", file=sys.stderr)
-        raise
+# Fixed part of the commit message, followed by the list of updated documents
+COMMIT_MESSAGE_HEADER = """docs: Update documentation based on code changes
+
+Updated by DocuCat AI assistant based on recent code changes.
+
+Documents updated:
+"""
 
 def commit_and_push_changes(state: DocuCatState):
     """
@@ -39,73 +26,66 @@ def commit_and_push_changes(state: DocuCatState):
         documents_updated: List of document file paths that were updated
         working_dir: Directory to run git commands in (defaults to current directory)
     """
-    repo_path = state.get("repo_path")
-    messages = state.get("messages", [])
-    documents_updated = []
-    # Find all write_file tool calls to determine which documents were updated
-    for message in messages:
-        if hasattr(message, "tool_calls") and message.tool_calls:
-            for tool_call in message.tool_calls:
-                if tool_call.get("name") == "write_file":
-                    filepath = tool_call.get("args", {}).get("filepath")
-                    if filepath and filepath not in documents_updated:
-                        documents_updated.append(filepath)
+    # Resolve the repository once for all the git commands below
+    repo_path = os.path.realpath(state.get("repo_path") or ".")
+    documents_updated = getResultFromState(state)["documents_updated"]
     if not documents_updated:
         return
 
     try:
         print()
-        print("=" * 60)
-        print("📝 Committing and Pushing Changes")
-        print("=" * 60)
-        print()
-
-        # Configure git
-        configure_git(repo_path)
+        print_banner("📝 Committing and Pushing Changes")
 
         # Stage the updated files
         print(f"📦 Staging {len(documents_updated)} updated document(s)...")
+        # A single missing path makes `git add` fail as a whole, so drop those first
+        documents_to_stage = []
         for doc in documents_updated:
+            if os.path.exists(os.path.join(repo_path, doc)):
+                documents_to_stage.append(doc)
+            else:
+                print(f"  ⚠ Could not stage: {doc} (does not exist)")
+
+        if documents_to_stage:
+            # Paths are passed on stdin, NUL-separated, so no list is too long for the command line
             result = subprocess.run(
-                ['git', 'add', doc],
+                ['git', 'add', '--pathspec-from-file=-', '--pathspec-file-nul'],
                 cwd=repo_path,
+                input="\0".join(documents_to_stage),
                 capture_output=True,
                 text=True
             )
-            if result.returncode == 0:
-                print(f"  ✓ Staged: {doc}")
-            else:
-                print(f"  ⚠ Could not stage: {doc} (might not exist or already staged)")
+            if result.returncode != 0:
+                print(f"  ⚠ Could not stage documents: {result.stderr.strip()}")
 
-        # Check if there are changes to commit
-        status_result = subprocess.run(
-            ['git', 'status', '--porcelain'],
+        # List the staged changes once, both to report each staged document and to
+        # check if there is anything to commit
+        diff_result = subprocess.run(
+            ['git', 'diff', '--cached', '--name-only', '-z'],
             cwd=repo_path,
             capture_output=True,
-            text=True,
             check=True
         )
+        staged_files = {os.fsdecode(path) for path in diff_result.stdout.split(b'\0') if path}
+        staged_documents = [doc for doc in documents_to_stage if doc in staged_files]
+        for doc in staged_documents:
+            print(f"  ✓ Staged: {doc}")
 
-        if not status_result.stdout.strip():
+        if not staged_files:
             print()
             print("ℹ️  No changes to commit (files may not have been modified).")
             return
 
-        # Create commit message
-        commit_message = """docs: Update documentation based on code changes
-
-Updated by DocuCat AI assistant based on recent code changes.
-
-Documents updated:
-"""
-        for doc in documents_updated:
-            commit_message += f"  - {doc}\n"
+        # Create commit message, listing what the commit actually contains: the
+        # staged documents in the order they were updated, then anything else staged
+        committed_files = staged_documents + sorted(staged_files.difference(staged_documents))
+        commit_message = COMMIT_MESSAGE_HEADER + "".join(f"  - {file}\n" for file in committed_files)
 
         # Create the commit
         print()
         print("💾 Creating commit...")
         subprocess.run(
-            ['git', 'commit', '-m', commit_message],
+            ['git', '-c', f'user.name={GIT_USER_NAME}', '-c', f'user.email={GIT_USER_EMAIL}', 'commit', '-m', commit_message],
             cwd=repo_path,
             check=True,
             capture_output=True
@@ -1,56 +1,189 @@
-import urllib.request
-import json
+import httpx
+import os
+import re
 import subprocess
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from agents.docu_cat_state import DocuCatState
+from agents.github_client import get_github_client
+from agents.utils import loads_json, write_json_file
 
 
-def get_changed_files_from_api(token, repository, pr_number) -> list[str] | None:
+# Maximum page size supported by the GitHub API
+FILES_PER_PAGE = 100
+
+# Maximum number of pages fetched concurrently
+MAX_CONCURRENT_PAGES = 8
+
+# Page number of the rel="last" link of a GitHub Link header
+LAST_PAGE_PATTERN = re.compile(r'[?&]page=(\d+)[^>]*>; rel="last"')
+
+# Changed files of pull requests keyed by (repository, PR number, head SHA).
+# The head SHA pins the file list, so entries never go stale.
+CHANGED_FILES_CACHE_SIZE = 256
+changed_files_cache: OrderedDict[tuple, list[str]] = OrderedDict()
+
+# ETag, Link header and file names of each page of the PR files endpoint, keyed by
+# path. It is kept in the home directory so that repeated local runs, such as the
+# experiment, make conditional requests that cost no rate limit when the PR has
+# not changed.
+ETAG_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.docucat_etags.json')
+ETAG_CACHE_SIZE = 256
+
+
+def load_etag_cache() -> dict:
+    """
+    Load the ETag cache from disk.
+
+    Returns:
+        dict: Cached pages keyed by path, empty if there is no usable cache
+    """
+    try:
+        with open(ETAG_CACHE_PATH, 'rb') as f:
+            return loads_json(f.read())
+    except (OSError, ValueError):
+        return {}
+
+def save_etag_cache(etag_cache: dict):
+    """
+    Write the ETag cache to disk atomically, keeping the most recent entries.
+
+    Args:
+        etag_cache: Cached pages keyed by path
+    """
+    entries = list(etag_cache.items())[-ETAG_CACHE_SIZE:]
+    write_json_file(ETAG_CACHE_PATH, dict(entries))
+
+def fetch_page(client, path, etag_cache) -> tuple[list[str], str | None]:
+    """
+    Fetch the file names of one page of the PR files endpoint.
+
+    The request is conditional when the page is in the ETag cache, and the
+    cached file names are used when GitHub answers 304 Not Modified.
+
+    Args:
+        client: GitHub API client
+        path: Path of the page
+        etag_cache: Cached pages keyed by path, updated with the response
+
+    Returns:
+        tuple: (file names, Link header or None)
+    """
+    cached = etag_cache.pop(path, None)
+    headers = {'If-None-Match': cached['etag']} if cached else None
+
+    response = client.get(path, headers=headers)
+    if response.status_code == 304 and cached:
+        filenames, link_header, etag = cached['files'], cached['link'], cached['etag']
+    elif response.status_code == 200:
+        filenames = [file['filename'] for file in loads_json(response.content)]
+        link_header = response.headers.get('Link')
+        etag = response.headers.get('ETag')
+    else:
+        raise httpx.HTTPStatusError(f"GitHub API returned {response.status_code} for {path}", request=response.request, response=response)
+
+    if etag:
+        etag_cache[path] = {'etag': etag, 'link': link_header, 'files': filenames}
+    return filenames, link_header
+
+def cache_changed_files(cache_key, changed_files):
+    """
+    Store the changed files of a pull request, evicting the least recently used entry when full.
+
+    Args:
+        cache_key: (repository, PR number, head SHA)
+        changed_files: Changed file paths
+    """
+    changed_files_cache[cache_key] = list(changed_files)
+    changed_files_cache.move_to_end(cache_key)
+    while len(changed_files_cache) > CHANGED_FILES_CACHE_SIZE:
+        changed_files_cache.popitem(last=False)
+
+def get_last_page(link_header) -> int:
+    """
+    Get the number of the last page from a GitHub Link header.
+
+    Args:
+        link_header: Value of the Link header, or None if there is a single page
+
+    Returns:
+        int: Number of the last page
+    """
+    match = LAST_PAGE_PATTERN.search(link_header or '')
+    return int(match.group(1)) if match else 1
+
+
+def get_changed_files_from_api(token, repository, pr_number, head_sha=None) -> list[str] | None:
     """
     Get changed files using GitHub API.
 
+    Results are cached in memory when the head SHA is known, and the pages are
+    fetched with conditional requests using the ETag cache in the home directory.
+
     Args:
         token: GitHub API token
         repository: Repository in format 'owner/repo'
         pr_number: Pull request number
+        head_sha: Head commit SHA of the pull request, used as the cache key
 
     Returns:
         list: List of changed file paths
     """
-    url = f"https://api.github.com/repos/{repository}/pulls/{pr_number}/files"
+    cache_key = None
+    if head_sha:
+        cache_key = (repository, str(pr_number), head_sha)
+        if cache_key in changed_files_cache:
+            changed_files_cache.move_to_end(cache_key)
+            return list(changed_files_cache[cache_key])
 
-    headers = {
-        'Authorization': f'token {token}',
-        'Accept': 'application/vnd.github.v3+json',
-        'User-Agent': 'DocuCat-Action'
-    }
+    path = f"/repos/{repository}/pulls/{pr_number}/files?per_page={FILES_PER_PAGE}"
 
     try:
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req) as response:
-            data = json.loads(response.read().decode())
-            return [file['filename'] for file in data]
+        client = get_github_client(token)
+        etag_cache = load_etag_cache()
+        changed_files, link_header = fetch_page(client, f"{path}&page=1", etag_cache)
+
+        # The first page tells how many pages there are, so fetch the rest concurrently
+        last_page = get_last_page(link_header)
+        if last_page > 1:
+            with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_PAGES, last_page - 1)) as executor:
+                pages = executor.map(lambda page: fetch_page(client, f"{path}&page={page}", etag_cache)[0], range(2, last_page + 1))
+                for filenames in pages:
+                    changed_files.extend(filenames)
+
+        save_etag_cache(etag_cache)
+
+        if cache_key:
+            cache_changed_files(cache_key, changed_files)
+
+        return changed_files
     except:
         return
 
-def get_changed_files_from_git(base_sha, head_sha):
+def get_changed_files_from_git(base_sha, head_sha, repo_path=None):
     """
     Get changed files using git diff.
 
     Args:
         base_sha: Base commit SHA
         head_sha: Head commit SHA
+        repo_path: Path to the git repository (defaults to current directory)
 
     Returns:
         list: List of changed file paths
     """
     try:
-        result = subprocess.run(
-            ['git', 'diff', '--name-only', base_sha, head_sha],
-            capture_output=True,
-            text=True,
-            check=True
+        # NUL-separated output keeps file names with spaces or newlines intact
+        process = subprocess.Popen(
+            ['git', 'diff', '--name-only', '-z', base_sha, head_sha],
+            cwd=repo_path,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
         )
-        return [f for f in result.stdout.strip().split('\n') if f]
+        stdout, stderr = process.communicate()
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, process.args, stderr=stderr)
+        return [f.decode('utf-8', 'surrogateescape') for f in stdout.split(b'\0') if f]
     except:
         return
 
@@ -60,14 +193,15 @@ def get_changed_files_github(state: DocuCatState):
     pr_number = state.get("pr_number")
     base_sha = state.get("base_sha")
     head_sha = state.get("head_sha")
+    repo_path = state.get("repo_path")
 
     changed_files = []
     if token and repository and pr_number:
         print(f"Fetching changed files from GitHub API for PR #{pr_number}")
-        changed_files = get_changed_files_from_api(token, repository, pr_number)
+        changed_files = get_changed_files_from_api(token, repository, pr_number, head_sha)
     elif base_sha and head_sha:
         print(f"Fetching changed files from git for base SHA {base_sha} and head SHA {head_sha}")
-        changed_files = get_changed_files_from_git(base_sha, head_sha)
+        changed_files = get_changed_files_from_git(base_sha, head_sha, repo_path)
     else:
         return
     return {"changed_files": changed_files}
\ No newline at end of file
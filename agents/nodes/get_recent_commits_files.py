@@ -1,7 +1,78 @@
+import os
 import subprocess
 from agents.docu_cat_state import DocuCatState
+from agents.utils import loads_json, write_json_file
 
-def get_recent_commits_files(state: DocuCatState) -> list[str]:
+# Size of the chunks read from the git output
+READ_CHUNK_SIZE = 64 * 1024
+
+# Directory inside the git directory where the changed files of the last N
+# commits are cached, keyed by the HEAD SHA and N. A commit never changes, so
+# entries never go stale.
+COMMIT_FILES_CACHE_DIR = 'docucat'
+
+def read_paths_from_git(args: list, repo_path: str) -> list:
+    """
+    Run a git command printing NUL-separated paths and collect them.
+
+    Args:
+        args: The git command to run, with -z among its options
+        repo_path: Path to the git repository
+
+    Returns:
+        list: Unique paths in output order
+
+    Raises:
+        subprocess.CalledProcessError: If the git command fails
+    """
+    with subprocess.Popen(
+        args,
+        cwd=repo_path,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    ) as process:
+        # Paths are NUL-separated, so they need no stripping or unquoting;
+        # get unique files in output order, skipping empty separators.
+        # The output is parsed chunk by chunk while git is still writing it,
+        # carrying over the incomplete path at the end of each chunk
+        files = {}
+        pending = b''
+        for chunk in iter(lambda: process.stdout.read(READ_CHUNK_SIZE), b''):
+            *paths, pending = (pending + chunk).split(b'\0')
+            files.update(dict.fromkeys(filter(None, paths)))
+        if pending:
+            files[pending] = None
+        stderr = process.stderr.read().decode(errors='replace')
+
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, process.args, stderr=stderr)
+
+    return [os.fsdecode(path) for path in files]
+
+def resolve_head(repo_path: str) -> tuple[str, str] | None:
+    """
+    Resolve the git directory and the HEAD SHA of a repository.
+
+    Args:
+        repo_path: Path to the git repository
+
+    Returns:
+        tuple: (git directory, HEAD SHA), or None if HEAD cannot be resolved
+    """
+    # One command gives both
+    result = subprocess.run(
+        ['git', 'rev-parse', '--absolute-git-dir', 'HEAD'],
+        cwd=repo_path,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        return None
+
+    git_dir, head_sha = result.stdout.split()
+    return git_dir, head_sha
+
+def get_recent_commits_files(state: DocuCatState) -> dict:
     """
     Get changed files from the last N commits.
 
@@ -10,30 +81,49 @@ def get_recent_commits_files(state: DocuCatState) -> list[str]:
         commit_count: Number of recent commits to analyze
 
     Returns:
-        list: List of unique changed file paths
+        dict: State update with the list of unique changed file paths, and the
+              analyzed range pinned to the HEAD SHA when it can be resolved
     """
 
     commit_count = state.get("commit_count", 1)
     repo_path = state.get("repo_path", ".")
 
     try:
-        # Get the commit range (last N commits)
-        result = subprocess.run(
-            ['git', 'log', f'-{commit_count}', '--name-only', '--pretty=format:'],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-
-        # Parse output and get unique files
-        files = set()
-        for line in result.stdout.strip().split('\n'):
-            line = line.strip()
-            if line:  # Skip empty lines
-                files.add(line)
-
-        return {"changed_files": list(files)}
+        cache_path = None
+        revisions = {}
+        diff_range = f'HEAD~{commit_count}..HEAD'
+        head = resolve_head(repo_path)
+        if head:
+            git_dir, head_sha = head
+            cache_path = os.path.join(git_dir, COMMIT_FILES_CACHE_DIR, f"commit_files_{head_sha}_{commit_count}.json")
+            # Later nodes compare the same commits even if HEAD moves in the meantime
+            revisions = {"base_sha": f"{head_sha}~{commit_count}", "head_sha": head_sha}
+            diff_range = f'{head_sha}~{commit_count}..{head_sha}'
+            try:
+                with open(cache_path, 'rb') as f:
+                    return {"changed_files": loads_json(f.read()), **revisions}
+            except (OSError, ValueError):
+                pass
+
+        # A single tree diff over the whole range gives the union of the files
+        # changed by the last N commits without diffing every commit
+        try:
+            files = read_paths_from_git(
+                ['git', 'diff', '--name-only', '-z', diff_range],
+                repo_path
+            )
+        except subprocess.CalledProcessError:
+            # HEAD~N does not exist when the history (or a shallow clone) has no
+            # more than N commits, so list the files of each commit instead
+            files = read_paths_from_git(
+                ['git', 'log', f'-{commit_count}', '--name-only', '-z', '--pretty=format:', revisions.get('head_sha', 'HEAD')],
+                repo_path
+            )
+
+        if cache_path:
+            write_json_file(cache_path, files)
+
+        return {"changed_files": files, **revisions}
         
     except Exception as e:
         raise Exception(f"Error getting recent commits files: {e}")
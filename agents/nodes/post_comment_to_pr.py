@@ -1,10 +1,25 @@
-import urllib.request
-import json
 import sys
 
-from langchain_core.messages import AIMessage
+import httpx
 from agents.docu_cat_state import DocuCatState
-from agents.utils import getResultFromState
+from agents.github_client import get_github_client
+from agents.utils import dumps_json, getResultFromState
+
+
+# Fixed parts of the PR comment
+COMMENT_HEADER = "## 🐱 DocuCat Summary\n\n"
+COMMENT_FOOTER = "\n---\n*🤖 This comment was automatically generated by [DocuCat](https://github.com/lu/docu-cat) using Claude Haiku 4.5*\n"
+NO_UPDATES_NEEDED_SECTION = (
+    "### ✅ No Documentation Updates Needed\n\n"
+    "After analyzing the code changes, DocuCat determined that no documentation updates are required.\n"
+)
+NO_DOCUMENTS_UPDATED_SECTION = (
+    "### ℹ️ Analysis Complete\n\n"
+    "DocuCat completed its analysis but no documentation files were updated.\n"
+)
+
+# Number of changed files listed in the comment
+COMMENT_CHANGED_FILES_LIMIT = 10
 
 def format_pr_comment(state: DocuCatState) -> str:
     """
@@ -19,47 +34,43 @@ def format_pr_comment(state: DocuCatState) -> str:
     changed_files = state.get("changed_files")
     config = state.get("config", {})
     result = getResultFromState(state)
-    
-    comment = "## 🐱 DocuCat Summary\n\n"
+
+    # The parts are joined once at the end rather than concatenated one by one
+    parts = [COMMENT_HEADER]
 
     # Add changed files summary
-    comment += f"**Changed Files ({len(changed_files)}):**\n"
-    for file in changed_files[:10]:  # Limit to first 10 files
-        comment += f"- `{file}`\n"
-    if len(changed_files) > 10:
-        comment += f"- ... and {len(changed_files) - 10} more\n"
-    comment += "\n"
+    parts.append(f"**Changed Files ({len(changed_files)}):**\n")
+    parts.extend(f"- `{file}`\n" for file in changed_files[:COMMENT_CHANGED_FILES_LIMIT])
+    if len(changed_files) > COMMENT_CHANGED_FILES_LIMIT:
+        parts.append(f"- ... and {len(changed_files) - COMMENT_CHANGED_FILES_LIMIT} more\n")
+    parts.append("\n")
 
     # Add analysis section
     if result.get('analysis'):
-        comment += "# 🔍 Analysis\n\n"
-        comment += result['analysis'] + "\n\n"
+        parts.append("# 🔍 Analysis\n\n")
+        parts.append(result['analysis'] + "\n\n")
 
     # Add documentation update summary
     if result.get('no_updates_needed'):
-        comment += "### ✅ No Documentation Updates Needed\n\n"
-        comment += "After analyzing the code changes, DocuCat determined that no documentation updates are required.\n"
+        parts.append(NO_UPDATES_NEEDED_SECTION)
     elif result.get('documents_updated'):
         docs = result['documents_updated']
-        comment += f"### 📝 Documentation Updated ({len(docs)})\n\n"
-        comment += "The following documentation files were updated:\n\n"
-        for doc in docs:
-            comment += f"- ✅ `{doc}`\n"
-        comment += "\n"
+        parts.append(f"### 📝 Documentation Updated ({len(docs)})\n\n")
+        parts.append("The following documentation files were updated:\n\n")
+        parts.extend(f"- ✅ `{doc}`\n" for doc in docs)
+        parts.append("\n")
 
         if config['shouldCreateCommits']:
-            comment += "**Status:** Changes have been committed and pushed to this PR.\n"
+            parts.append("**Status:** Changes have been committed and pushed to this PR.\n")
         else:
-            comment += "**Status:** Changes were analyzed but not committed (as per configuration).\n"
+            parts.append("**Status:** Changes were analyzed but not committed (as per configuration).\n")
     else:
-        comment += "### ℹ️ Analysis Complete\n\n"
-        comment += "DocuCat completed its analysis but no documentation files were updated.\n"
+        parts.append(NO_DOCUMENTS_UPDATED_SECTION)
 
     # Add footer
-    comment += "\n---\n"
-    comment += "*🤖 This comment was automatically generated by [DocuCat](https://github.com/lu/docu-cat) using Claude Haiku 4.5*\n"
+    parts.append(COMMENT_FOOTER)
 
-    return comment
+    return "".join(parts)
 
 def post_comment_to_pr(state: DocuCatState):
     """
@@ -79,27 +90,22 @@ def post_comment_to_pr(state: DocuCatState):
     pr_number = state.get("pr_number")
     comment_body = format_pr_comment(state)
 
-    url = f"https://api.github.com/repos/{repository}/issues/{pr_number}/comments"
+    path = f"/repos/{repository}/issues/{pr_number}/comments"
 
-    headers = {
-        'Authorization': f'token {token}',
-        'Accept': 'application/vnd.github.v3+json',
-        'User-Agent': 'DocuCat-Action',
-        'Content-Type': 'application/json'
-    }
+    headers = {'Content-Type': 'application/json'}
 
-    data = json.dumps({'body': comment_body}).encode('utf-8')
+    data = dumps_json({'body': comment_body})
 
     try:
-        req = urllib.request.Request(url, data=data, headers=headers, method='POST')
-        with urllib.request.urlopen(req) as response:
-            if response.status == 201:
-                print("✅ Comment posted to PR successfully")
-            else:
-                print(f"⚠️  Unexpected response status: {response.status}")
-    except urllib.error.HTTPError as e:
-        print(f"❌ Error posting comment: {e.code} {e.reason}", file=sys.stderr)
-        error_body = e.read().decode()
-        print(f"   Response: {error_body}", file=sys.stderr)
+        # The client shares its keep-alive connections with the changed files requests
+        response = get_github_client(token).post(path, content=data, headers=headers)
+        response.raise_for_status()
+        if response.status_code == 201:
+            print("✅ Comment posted to PR successfully")
+        else:
+            print(f"⚠️  Unexpected response status: {response.status_code}")
+    except httpx.HTTPStatusError as e:
+        print(f"❌ Error posting comment: {e.response.status_code} {e.response.reason_phrase}", file=sys.stderr)
+        print(f"   Response: {e.response.text}", file=sys.stderr)
     except Exception as e:
         print(f"❌ Error posting comment: {e}", file=sys.stderr)
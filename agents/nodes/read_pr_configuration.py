@@ -1,9 +1,35 @@
 import os
 import json
 import re
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage
+from functools import lru_cache
 from agents.docu_cat_state import DocuCatConfig, DocuCatState
+from agents.utils import loads_json
+
+
+# Checkboxes of the "Configurations of DocuCat" section of the PR template
+ENABLED_CHECKBOX_PATTERN = re.compile(r'-\s*\[([ xX])\]\s*Enable DocuCat')
+CREATE_COMMITS_CHECKBOX_PATTERN = re.compile(r'-\s*\[([ xX])\]\s*Should DocuCat create commits\?')
+
+
+@lru_cache(maxsize=16)
+def read_pr_description_from_file(event_path: str, mtime_ns: int) -> str:
+    """
+    Read PR description from a GitHub event file.
+
+    The description is cached per file and modification time, so repeated runs
+    in one process parse the event payload once.
+
+    Args:
+        event_path: Path of the event file
+        mtime_ns: Modification time of the event file, part of the cache key
+
+    Returns:
+        PR description text
+    """
+    # The event payload can be large, so it is parsed with orjson when available
+    with open(event_path, 'rb') as f:
+        event_data = loads_json(f.read())
+        return event_data.get('pull_request', {}).get('body', '')
 
 
 def read_pr_description_from_event() -> str | None:
@@ -18,40 +44,57 @@ def read_pr_description_from_event() -> str | None:
         return None
 
     try:
-        with open(event_path, 'r') as f:
-            event_data = json.load(f)
-            return event_data.get('pull_request', {}).get('body', '')
+        return read_pr_description_from_file(event_path, os.stat(event_path).st_mtime_ns)
     except Exception as e:
         print(f"Warning: Could not read PR description from event: {e}")
         return None
 
 
-def parse_configuration_with_llm(pr_description: str) -> DocuCatConfig:
+def parse_configuration_checkboxes(pr_description: str) -> DocuCatConfig | None:
     """
-    Use Claude Haiku to parse DocuCat configuration from PR description.
+    Parse DocuCat configuration from the checkboxes of the PR description template.
+
+    Args:
+        pr_description: The pull request description in Markdown format
+
+    Returns:
+        DocuCatConfig with parsed settings, or None if the checkboxes are not found
+    """
+    enabled_match = ENABLED_CHECKBOX_PATTERN.search(pr_description)
+    commits_match = CREATE_COMMITS_CHECKBOX_PATTERN.search(pr_description)
+    if not enabled_match or not commits_match:
+        return None
+
+    return {
+        "enabled": enabled_match.group(1) in "xX",
+        "shouldCreateCommits": commits_match.group(1) in "xX"
+    }
+
+
+@lru_cache(maxsize=128)
+def request_configuration_from_llm(pr_description: str) -> DocuCatConfig:
+    """
+    Ask Claude Haiku for the DocuCat configuration in a PR description.
+
+    The call is deterministic (temperature 0), so replies are memoized by PR
+    description. Failures raise and are therefore not cached.
 
     Args:
         pr_description: The pull request description in Markdown format
 
     Returns:
         DocuCatConfig with parsed settings
+
+    Raises:
+        ValueError: If the reply does not contain a JSON object
     """
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        print("Warning: OPENROUTER_API_KEY not set. Using default configuration.")
-        return {"enabled": True, "shouldCreateCommits": True}
+    # Imported here so that runs which never reach the LLM skip the import
+    from langchain_core.messages import HumanMessage
+    from agents.llm_client import get_llm
 
-    try:
-        # Initialize ChatOpenAI with OpenRouter
-        llm = ChatOpenAI(
-            model="anthropic/claude-haiku-4.5",
-            openai_api_key=api_key,
-            openai_api_base="https://openrouter.ai/api/v1",
-            max_tokens=500,
-            temperature=0,
-        )
+    llm = get_llm(max_tokens=500, temperature=0)
 
-        prompt = f"""You are a configuration expert. Read the following GitHub pull request description and extract DocuCat configuration.
+    prompt = f"""You are a configuration expert. Read the following GitHub pull request description and extract DocuCat configuration.
 
 DocuCat is a documentation AI assistant. The configuration is typically found in a section like:
 
@@ -74,21 +117,45 @@ Rules:
 - Default to {{"enabled": true, "shouldCreateCommits": true}} if no configuration section found
 """
 
-        response = llm.invoke([HumanMessage(content=prompt)])
-        response_text = response.content.strip()
-
-        # Extract JSON from response (in case it's wrapped in code blocks)
-        json_match = re.search(r'\{[^}]+\}', response_text)
-        if json_match:
-            config_dict = json.loads(json_match.group())
-            return {
-                "enabled": bool(config_dict.get("enabled", True)),
-                "shouldCreateCommits": bool(config_dict.get("shouldCreateCommits", True))
-            }
-        else:
-            print(f"Warning: Could not parse LLM response: {response_text}")
-            return {"enabled": True, "shouldCreateCommits": True}
+    response = llm.invoke([HumanMessage(content=prompt)])
+    response_text = response.content.strip()
+
+    # Extract JSON from response (in case it's wrapped in code blocks)
+    json_start = response_text.find('{')
+    if json_start == -1:
+        raise ValueError(f"Could not parse LLM response: {response_text}")
+
+    config_dict, _ = json.JSONDecoder().raw_decode(response_text, json_start)
+    return {
+        "enabled": bool(config_dict.get("enabled", True)),
+        "shouldCreateCommits": bool(config_dict.get("shouldCreateCommits", True))
+    }
+
+
+def parse_configuration_with_llm(pr_description: str) -> DocuCatConfig:
+    """
+    Use Claude Haiku to parse DocuCat configuration from PR description.
+
+    The checkboxes of the PR description template are parsed directly, and
+    the LLM is only called when they are not found.
+
+    Args:
+        pr_description: The pull request description in Markdown format
+
+    Returns:
+        DocuCatConfig with parsed settings
+    """
+    config = parse_configuration_checkboxes(pr_description)
+    if config:
+        return config
+
+    if not os.getenv("OPENROUTER_API_KEY"):
+        print("Warning: OPENROUTER_API_KEY not set. Using default configuration.")
+        return {"enabled": True, "shouldCreateCommits": True}
 
+    try:
+        # Copy the cached result so that callers cannot mutate it
+        return dict(request_configuration_from_llm(pr_description))
     except Exception as e:
         print(f"Warning: Error parsing configuration with LLM: {e}")
         return {"enabled": True, "shouldCreateCommits": True}
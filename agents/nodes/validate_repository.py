@@ -1,5 +1,5 @@
+import os
 from agents.docu_cat_state import DocuCatState
-from pathlib import Path
 
 
 def validate_repository(state: DocuCatState) -> bool:
@@ -10,16 +10,13 @@ def validate_repository(state: DocuCatState) -> bool:
         bool: True if valid git repository
     """
     repo_path = state.get("repo_path", ".")
-    repo_path = Path(repo_path).resolve()
 
-    if not repo_path.exists():
-        return True
-
-    if not repo_path.is_dir():
-        return False
-
-    git_dir = repo_path / '.git'
-    if not git_dir.exists():
+    # .git is a directory in a regular clone, but a file in worktrees and submodules.
+    # Either way it can only exist inside an existing directory, so a single stat
+    # also checks that the repository path exists and is a directory.
+    try:
+        os.stat(os.path.join(repo_path, '.git'))
+    except OSError:
         return False
 
     return True
@@ -1,7 +1,25 @@
+import json
+import os
+import sys
+import threading
 from typing import TypedDict
 from langchain_core.messages import AIMessage
 from agents.docu_cat_state import DocuCatState
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Changed files that cannot make documentation outdated: documents themselves
+# and CI configuration
+DOCUMENT_EXTENSIONS = {'.md', '.mdx', '.rst', '.adoc'}
+NON_CODE_PREFIXES = ('docs/', '.github/')
+
+# Number of changed files listed in the result, unless DOCUCAT_VERBOSE=1 lists them all
+CHANGED_FILES_LIST_LIMIT = int(os.getenv('DOCUCAT_LIST_LIMIT', '20'))
+
 
 class DocuCatResult(TypedDict):
     """Result from the agents' states."""
@@ -10,6 +28,67 @@ class DocuCatResult(TypedDict):
     documents_updated: list[str]
     no_updates_needed: bool
 
+def loads_json(data: bytes | str):
+    """
+    Parse a JSON document, using orjson when it is installed.
+
+    Args:
+        data: JSON document as bytes or text
+
+    Returns:
+        The decoded JSON value
+    """
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps_json(data) -> bytes:
+    """
+    Serialize a value to a UTF-8 JSON document, using orjson when it is installed.
+
+    Args:
+        data: JSON-serializable value
+
+    Returns:
+        bytes: The encoded JSON document
+    """
+    if orjson:
+        return orjson.dumps(data)
+    return json.dumps(data).encode('utf-8')
+
+def write_json_file(path, data):
+    """
+    Write a JSON file atomically, ignoring errors since the caches are optional.
+
+    Args:
+        path: Path of the file
+        data: JSON-serializable data
+    """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per thread, since concurrent experiment items may write the same file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(dumps_json(data))
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+def has_code_changes(changed_files: list[str]) -> bool:
+    """
+    Check if any changed file may require documentation updates.
+
+    Args:
+        changed_files: Changed file paths
+
+    Returns:
+        True if at least one file is neither a document nor CI configuration
+    """
+    return any(
+        os.path.splitext(file)[1].lower() not in DOCUMENT_EXTENSIONS and not file.startswith(NON_CODE_PREFIXES)
+        for file in changed_files
+    )
+
 def getResultFromState(state: DocuCatState) -> DocuCatResult:
     """
     Get the result from the state.
@@ -22,33 +101,82 @@ def getResultFromState(state: DocuCatState) -> DocuCatResult:
     """
     changed_files = state.get("changed_files")
     analysis = ""
-    documents_updated = []
+    documents_updated = {}
     no_updates_needed = False
     messages = state.get("messages", [])
 
-    # Find the final AI response
-    for message in reversed(messages):
+    # Find the final AI response and all write_file tool calls in a single pass.
+    # The write_file calls determine which documents were updated.
+    # The dict keeps the filepaths unique and in the order they were written.
+    for message in messages:
         if isinstance(message, AIMessage) and message.content:
             analysis = message.content
-            break
-
+        for tool_call in getattr(message, "tool_calls", None) or []:
+            if tool_call.get("name") == "write_file":
+                filepath = tool_call.get("args", {}).get("filepath")
+                if filepath:
+                    documents_updated[filepath] = None
 
     # Check if agent indicated no updates needed
     if "NO_UPDATES_NEEDED" in analysis:
         no_updates_needed = True
-
-    # Find all write_file tool calls to determine which documents were updated
-    for message in messages:
-        if hasattr(message, "tool_calls") and message.tool_calls:
-            for tool_call in message.tool_calls:
-                if tool_call.get("name") == "write_file":
-                    filepath = tool_call.get("args", {}).get("filepath")
-                    if filepath and filepath not in documents_updated:
-                        documents_updated.append(filepath)
     
     return {
         "changed_files": changed_files,
         "analysis": analysis if analysis else "No analysis available",
-        "documents_updated": documents_updated,
+        "documents_updated": list(documents_updated),
         "no_updates_needed": no_updates_needed
     }
+
+def print_banner(*lines: str):
+    """
+    Print a banner, the given lines between two separators, in a single write.
+
+    Args:
+        lines: Lines of the banner
+    """
+    separator = "=" * 60
+    sys.stdout.write("\n".join([separator, *lines, separator, "", ""]))
+
+def print_result(result: DocuCatResult):
+    """
+    Print the changed files, the analysis and the updated documents of a run.
+
+    Args:
+        result: Result from the state
+    """
+    changed_files = result.get("changed_files")
+    analysis = result.get("analysis")
+    documents_updated = result.get("documents_updated")
+
+    # Print changed files
+    if changed_files:
+        limit = len(changed_files) if os.getenv('DOCUCAT_VERBOSE') == '1' else CHANGED_FILES_LIST_LIMIT
+        lines = [f"\n✅ Found {len(changed_files)} changed file(s):\n"]
+        lines.extend(f"  {i}. {file_path}" for i, file_path in enumerate(changed_files[:limit], 1))
+        if len(changed_files) > limit:
+            lines.append(f"  ... and {len(changed_files) - limit} more")
+        # The list is written out at once rather than line by line
+        sys.stdout.write("\n".join(lines) + "\n\n")
+    else:
+        print("\n📝 No changed files detected.\n")
+
+    # Analyze and display results
+    if changed_files:
+        print_banner("🤖 Analysis Results", "   (Claude Haiku 4.5 via OpenRouter)")
+
+        if analysis:
+            print("📊 Analysis:")
+            print("-" * 60)
+            print(analysis)
+            print()
+
+            # Check for updates
+            if "NO_UPDATES_NEEDED" in analysis:
+                print("✅ No documents needed updates.")
+            else:
+                if documents_updated:
+                    sys.stdout.write("📝 Documents Updated:\n" + "-" * 60 + "\n" + "".join(f"  ✓ {doc}\n" for doc in documents_updated))
+                else:
+                    print("ℹ️  No documents were updated.")
+            print()
@@ -11,4 +11,11 @@ def calculate_precision(predicted_files, expected_files):
     return 1
 
 def calculate_f1_score(predicted_files, expected_files):
-  return 2 * (calculate_precision(predicted_files, expected_files) * calculate_recall(predicted_files, expected_files)) / (calculate_precision(predicted_files, expected_files) + calculate_recall(predicted_files, expected_files))
+  predicted_set = set(predicted_files)
+  expected_set = set(expected_files)
+  true_positives = len(predicted_set & expected_set)
+  precision = true_positives / len(predicted_set) if predicted_set else 1
+  recall = true_positives / len(expected_set) if expected_set else 1
+  if precision + recall == 0:
+    return 0
+  return 2 * precision * recall / (precision + recall)
@@ -7,43 +7,12 @@ This script runs on push events and commits the vector store changes.
 import os
 import sys
 import subprocess
-from pathlib import Path
 
-from vector_store import (
-    initialize_vector_store,
-    update_vector_store,
-    get_store_json_path,
-    get_vector_store_path,
-)
 
-
-def configure_git(working_dir: str = None):
-    """
-    Configure git user for commits.
-    Uses GitHub Actions bot identity.
-
-    Args:
-        working_dir: Directory to run git commands in (defaults to current directory)
-    """
-    try:
-        subprocess.run(
-            ['git', 'config', 'user.name', 'github-actions[bot]'],
-            cwd=working_dir,
-            check=True,
-            capture_output=True
-        )
-        subprocess.run(
-            ['git', 'config', 'user.email', '41898282+github-actions[bot]@users.noreply.github.com'],
-            cwd=working_dir,
-            check=True,
-            capture_output=True
-        )
-        print("✓ Git user configured")
-    except subprocess.CalledProcessError as e:
-        print(f"Error configuring git: {e}", file=sys.stderr)
-        if e.stderr:
-            print(f"stderr: {e.stderr.decode()}", file=sys.stderr)
-        raise
+# Identity of the vector store commits, passed to git with -c so that the
+# repository configuration is left untouched
+GIT_USER_NAME = "github-actions[bot]"
+GIT_USER_EMAIL = "41898282+github-actions[bot]@users.noreply.github.com"
 
 
 def commit_and_push_vector_store(repo_path: str, is_init: bool = False):
@@ -61,10 +30,11 @@ def commit_and_push_vector_store(repo_path: str, is_init: bool = False):
     print()
 
     try:
-        # Configure git
-        configure_git(repo_path)
+        # Resolve the repository once for all the git commands below
+        repo_path = os.path.realpath(repo_path)
 
         # Stage the .docucat directory (force add since it's in .gitignore)
+        from vector_store import get_vector_store_path
         docucat_path = get_vector_store_path(repo_path)
         print(f"📦 Staging vector store directory: {docucat_path}")
 
@@ -78,16 +48,15 @@ def commit_and_push_vector_store(repo_path: str, is_init: bool = False):
         if result.returncode != 0:
             print(f"⚠ Warning: git add returned non-zero: {result.stderr}")
 
-        # Check if there are changes to commit
-        status_result = subprocess.run(
-            ['git', 'status', '--porcelain'],
+        # Check if the vector store has staged changes (exit code 0 means none). The check is
+        # scoped to the vector store directory so git does not scan the whole worktree.
+        diff_result = subprocess.run(
+            ['git', 'diff', '--cached', '--quiet', '--', str(docucat_path)],
             cwd=repo_path,
-            capture_output=True,
-            text=True,
-            check=True
+            capture_output=True
         )
 
-        if not status_result.stdout.strip():
+        if diff_result.returncode == 0:
             print()
             print("ℹ️  No changes to commit (vector store may not have changed).")
             return
@@ -114,7 +83,7 @@ Co-Authored-By: Claude <noreply@anthropic.com>"""
         print()
         print("💾 Creating commit...")
         subprocess.run(
-            ['git', 'commit', '-m', commit_message],
+            ['git', '-c', f'user.name={GIT_USER_NAME}', '-c', f'user.email={GIT_USER_EMAIL}', 'commit', '-m', commit_message],
             cwd=repo_path,
             check=True,
             capture_output=True
@@ -163,18 +132,18 @@ def main():
     # When running as GitHub Action, TARGET_REPO_PATH is set to the target repository
     # When running locally, GITHUB_WORKSPACE or current directory is used
     repo_path = os.getenv('TARGET_REPO_PATH') or os.getenv('GITHUB_WORKSPACE') or os.getcwd()
-    repo_path = str(Path(repo_path).resolve())
+    repo_path = os.path.realpath(repo_path)
     print(f"📂 Repository path: {repo_path}")
 
-    # Verify the path exists and is a git repository
-    if not Path(repo_path).exists():
-        print(f"❌ Repository path does not exist: {repo_path}", file=sys.stderr)
-        sys.exit(1)
-
-    git_dir = Path(repo_path) / '.git'
-    if not git_dir.exists():
-        print(f"❌ Not a git repository: {repo_path}", file=sys.stderr)
-        print(f"   .git directory not found", file=sys.stderr)
+    # Verify the path exists and is a git repository. An existing .git implies
+    # an existing repository directory, so the path itself is only checked to
+    # tell the two errors apart.
+    if not os.path.exists(os.path.join(repo_path, '.git')):
+        if not os.path.exists(repo_path):
+            print(f"❌ Repository path does not exist: {repo_path}", file=sys.stderr)
+        else:
+            print(f"❌ Not a git repository: {repo_path}", file=sys.stderr)
+            print(f"   .git directory not found", file=sys.stderr)
         sys.exit(1)
 
     # Check if GEMINI_API_KEY is set
@@ -184,6 +153,15 @@ def main():
         print("   This is required for generating embeddings.", file=sys.stderr)
         sys.exit(1)
 
+    # The vector store module loads Milvus Lite and the Gemini client, so it is
+    # only imported once the checks above have passed
+    from vector_store import (
+        initialize_vector_store,
+        update_vector_store,
+        get_store_json_path,
+        get_vector_store_path,
+    )
+
     # Check if store.json exists
     store_json_path = get_store_json_path(repo_path)
     store_exists = store_json_path.exists()
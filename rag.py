@@ -6,24 +6,17 @@ Command-line tool to manage vector store for semantic search.
 This tool supports initializing, updating, and querying the vector store.
 """
 
+import os
 import sys
+import json
 import argparse
-from pathlib import Path
+import subprocess
+from functools import cache
+from vector_store_paths import get_vector_store_path, get_milvus_db_path, get_store_json_path
 
-from vector_store import (
-    initialize_vector_store,
-    update_vector_store,
-    get_store_info,
-    get_vector_store_path,
-)
 
-
-def main():
-    """Main entry point for RAG operations."""
-    parser = argparse.ArgumentParser(
-        description='DocuCat RAG - Manage vector store for semantic search',
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
+# Usage examples shown at the end of the --help output
+EPILOG = """
 Examples:
   # Initialize vector store in current directory
   rag --init
@@ -46,12 +39,283 @@ Examples:
   # Show info for specific repository
   rag --info /path/to/repo
 
+  # Read and split files with 4 workers
+  rag --init --jobs 4
+
 Using uv:
   uv run python rag.py --init
   uv run python rag.py --force-init /path/to/repo
   uv run python rag.py --update
   uv run python rag.py --info
-        """
+"""
+
+
+def is_vector_store_up_to_date(repo_path: str) -> bool:
+    """
+    Check if the vector store was last updated at the current HEAD commit.
+
+    Only store.json and git are read, so the check does not need the vector store
+    module, which loads Milvus Lite and the Gemini client. The paths come from
+    vector_store_paths, which the vector store module uses as well.
+
+    Args:
+        repo_path: Path to the repository
+
+    Returns:
+        bool: True if the vector store exists and is up to date with HEAD
+    """
+    if not get_milvus_db_path(repo_path).exists():
+        return False
+
+    try:
+        with open(get_store_json_path(repo_path), 'r', encoding='utf-8') as f:
+            last_update_sha = json.load(f).get('last_update_sha')
+    except (OSError, ValueError):
+        return False
+
+    result = subprocess.run(
+        ['git', 'rev-parse', 'HEAD'],
+        cwd=repo_path,
+        capture_output=True,
+        text=True
+    )
+    return result.returncode == 0 and result.stdout.strip() == last_update_sha
+
+
+def show_info(repo_path: str, args: argparse.Namespace):
+    """
+    Show information about the vector store (--info).
+
+    Args:
+        repo_path: Resolved path to the repository
+        args: Parsed command-line arguments
+    """
+    from vector_store import get_store_info
+
+    print("📊 Getting vector store information...")
+    info = get_store_info(repo_path)
+
+    if info:
+        lines = []
+        lines.append("")
+        lines.append(f"✅ Vector Store Information:")
+        lines.append(f"   Path: {info['path']}")
+        lines.append(f"   Collection: {info['collection_name']}")
+        lines.append(f"   Documents: {info['num_documents']}")
+        lines.append(f"   Embedding Dimension: {info['embedding_dim']}")
+        lines.append("")
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.exit(0)
+    else:
+        print()
+        print(f"❌ No vector store found or error accessing store")
+        print()
+        sys.exit(1)
+
+
+def initialize_store(repo_path: str, args: argparse.Namespace):
+    """
+    Initialize the vector store (--init and --force-init).
+
+    Args:
+        repo_path: Resolved path to the repository
+        args: Parsed command-line arguments
+    """
+    from vector_store import initialize_vector_store
+
+    print("🚀 Initializing vector store...")
+    print()
+
+    result = initialize_vector_store(repo_path, force=args.force_init, jobs=args.jobs)
+
+    if not result['success']:
+        # Handle different error types
+        if result['error_type'] == 'validation':
+            print(f"❌ Error: {result['error']}")
+        elif result['error_type'] == 'already_exists':
+            print(f"⚠️  {result['error']}")
+            print(f"   Use 'rag --force-init' to recreate it")
+        elif result['error_type'] == 'scan_error':
+            print(f"❌ Error scanning repository: {result['error']}")
+        elif result['error_type'] == 'processing_error':
+            print(f"❌ Error initializing vector store: {result['error']}")
+            if 'traceback' in result:
+                print()
+                print("Full error traceback:")
+                print(result['traceback'])
+        else:
+            print(f"❌ Error: {result['error']}")
+
+        print()
+        print("=" * 60)
+        sys.exit(1)
+
+    # Success - display detailed information, written out at once
+    lines = []
+    lines.append(f"📁 Created directory")
+    if result.get('store_existed'):
+        lines.append(f"🗑️  Removed existing database")
+    lines.append(f"🔌 Connected to Milvus Lite")
+    lines.append(f"📋 Created collection schema")
+    lines.append(f"🗃️  Created collection: {result['collection_name']}")
+    lines.append(f"🔍 Created index for vector search")
+    lines.append(f"✅ Collection created successfully!")
+    lines.append("")
+
+    lines.append(f"📂 Scanned repository for supported files")
+    lines.append(f"   Found {result['files_scanned']} supported file(s)")
+    lines.append("")
+
+    if result['files_scanned'] > 0:
+        lines.append(f"📝 Processed files and created chunks")
+        lines.append(f"   Processed {result['files_processed']}/{result['files_scanned']} files")
+        lines.append("")
+
+        if result['chunks_stored'] > 0:
+            lines.append(f"💾 Inserted {result['chunks_stored']} chunks into vector store")
+            lines.append(f"   ✓ All chunks inserted successfully")
+        else:
+            lines.append(f"⚠️  No chunks created (all files might be empty)")
+
+        # Show processing errors if any
+        if result.get('processing_errors'):
+            lines.append("")
+            lines.append(f"⚠️  Encountered {len(result['processing_errors'])} file processing errors:")
+            for file_path, error in result['processing_errors'][:5]:  # Show first 5
+                lines.append(f"   - {file_path}: {error}")
+            if len(result['processing_errors']) > 5:
+                lines.append(f"   ... and {len(result['processing_errors']) - 5} more")
+
+    lines.append("")
+    lines.append(f"✅ Vector store initialized and populated!")
+    lines.append("")
+    lines.append(f"📊 Final Statistics:")
+    lines.append(f"   Database Path: {result['db_path']}")
+    lines.append(f"   Collection: {result['collection_name']}")
+    lines.append(f"   Files scanned: {result['files_scanned']}")
+    lines.append(f"   Files processed: {result['files_processed']}")
+    lines.append(f"   Chunks stored: {result['chunks_stored']}")
+    lines.append(f"   Embedding time: {result.get('embed_seconds', 0.0):.1f}s")
+    lines.append(f"   Embedding Dimension: {result['embedding_dim']}")
+    lines.append("")
+    lines.append(f"💡 Next Steps:")
+    lines.append(f"   1. Generate actual embeddings for the chunks")
+    lines.append(f"   2. Use the store for semantic code/document search")
+    lines.append("")
+    lines.append("=" * 60)
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.exit(0)
+
+
+def update_store(repo_path: str, args: argparse.Namespace):
+    """
+    Update the vector store with the changes since the last update (--update).
+
+    Args:
+        repo_path: Resolved path to the repository
+        args: Parsed command-line arguments
+    """
+    print("🔄 Updating vector store...")
+    print()
+
+    # Stop before loading the vector store module when there is nothing to update
+    if is_vector_store_up_to_date(repo_path):
+        print("✅ No changes since last update")
+        print()
+        print("=" * 60)
+        sys.exit(0)
+
+    from vector_store import update_vector_store
+
+    result = update_vector_store(repo_path, jobs=args.jobs)
+
+    if not result['success']:
+        # Handle different error types
+        if result['error_type'] == 'validation':
+            print(f"❌ Error: {result['error']}")
+        elif result['error_type'] == 'git_error':
+            print(f"❌ Git error: {result['error']}")
+        elif result['error_type'] == 'processing_error':
+            print(f"❌ Error updating vector store: {result['error']}")
+            if 'traceback' in result:
+                print()
+                print("Full error traceback:")
+                print(result['traceback'])
+        else:
+            print(f"❌ Error: {result['error']}")
+
+        print()
+        print("=" * 60)
+        sys.exit(1)
+
+    # Success - display detailed information, written out at once
+    lines = []
+    lines.append(f"📊 Comparing commits...")
+    lines.append(f"   Old commit: {result['old_sha'][:8]}")
+    lines.append(f"   New commit: {result['new_sha'][:8]}")
+    lines.append("")
+
+    if result['changed_files'] == 0:
+        lines.append(f"✅ {result.get('message', 'No changes detected')}")
+    else:
+        lines.append(f"📂 Found {result['changed_files']} changed file(s)")
+        lines.append(f"   Processed {result['processed_files']} supported file(s)")
+        lines.append("")
+
+        lines.append(f"🗑️  Deleted {result['chunks_deleted']} old chunk(s)")
+        lines.append(f"➕ Added {result['chunks_added']} new chunk(s)")
+
+        # Show processing errors if any
+        if result.get('processing_errors'):
+            lines.append("")
+            lines.append(f"⚠️  Encountered {len(result['processing_errors'])} file processing errors:")
+            for file_path, error in result['processing_errors'][:5]:  # Show first 5
+                lines.append(f"   - {file_path}: {error}")
+            if len(result['processing_errors']) > 5:
+                lines.append(f"   ... and {len(result['processing_errors']) - 5} more")
+            if result.get('retry_needed'):
+                lines.append(f"   The store stays at commit {result['old_sha'][:8]}, so the next update retries these files.")
+
+        lines.append("")
+        lines.append(f"✅ Vector store updated successfully!")
+
+    lines.append("")
+    lines.append(f"📊 Update Statistics:")
+    lines.append(f"   Old SHA: {result['old_sha']}")
+    lines.append(f"   New SHA: {result['new_sha']}")
+    lines.append(f"   Changed files: {result['changed_files']}")
+    lines.append(f"   Processed files: {result['processed_files']}")
+    lines.append(f"   Chunks deleted: {result['chunks_deleted']}")
+    lines.append(f"   Chunks added: {result['chunks_added']}")
+    lines.append("")
+    lines.append("=" * 60)
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.exit(0)
+
+
+# Handler of each action, keyed by the destination of its argument. The vector
+# store module loads Milvus Lite and the Gemini client, so each handler imports
+# it only once it has work to do.
+ACTION_HANDLERS = {
+    'info': show_info,
+    'init': initialize_store,
+    'force_init': initialize_store,
+    'update': update_store,
+}
+
+
+@cache
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the command-line parser, once per process.
+
+    Returns:
+        argparse.ArgumentParser: Parser of the RAG command-line arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='DocuCat RAG - Manage vector store for semantic search',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=EPILOG
     )
 
     parser.add_argument(
@@ -87,19 +351,33 @@ Using uv:
         help='Show vector store information'
     )
 
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=os.cpu_count(),
+        help='Number of files read and split concurrently (default: number of CPUs)'
+    )
+
+    return parser
+
+
+def main():
+    """Main entry point for RAG operations."""
+    parser = build_parser()
     args = parser.parse_args()
 
-    # Check that at least one action is specified
-    if not any([args.init, args.force_init, args.update, args.info]):
+    # Check that exactly one action is specified
+    actions = [action for action in ACTION_HANDLERS if getattr(args, action)]
+    if not actions:
         parser.error("Please specify an action: --init, --force-init, --update, or --info")
-
-    # Check that only one action is specified
-    actions = sum([args.init, args.force_init, args.update, args.info])
-    if actions > 1:
+    if len(actions) > 1:
         parser.error("Please specify only one action at a time")
 
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
     # Convert to absolute path
-    repo_path = Path(args.repo_path).resolve()
+    repo_path = os.path.realpath(args.repo_path)
 
     print("=" * 60)
     print("DocuCat RAG - Vector Store Manager")
@@ -109,173 +387,7 @@ Using uv:
     print(f"📁 Vector Store: {get_vector_store_path(repo_path)}")
     print()
 
-    if args.info:
-        # Show store info
-        print("📊 Getting vector store information...")
-        info = get_store_info(str(repo_path))
-
-        if info:
-            print()
-            print(f"✅ Vector Store Information:")
-            print(f"   Path: {info['path']}")
-            print(f"   Collection: {info['collection_name']}")
-            print(f"   Documents: {info['num_documents']}")
-            print(f"   Embedding Dimension: {info['embedding_dim']}")
-            print()
-            sys.exit(0)
-        else:
-            print()
-            print(f"❌ No vector store found or error accessing store")
-            print()
-            sys.exit(1)
-
-    elif args.init or args.force_init:
-        # Initialize store
-        print("🚀 Initializing vector store...")
-        print()
-
-        result = initialize_vector_store(str(repo_path), force=args.force_init)
-
-        if not result['success']:
-            # Handle different error types
-            if result['error_type'] == 'validation':
-                print(f"❌ Error: {result['error']}")
-            elif result['error_type'] == 'already_exists':
-                print(f"⚠️  {result['error']}")
-                print(f"   Use 'rag --force-init' to recreate it")
-            elif result['error_type'] == 'scan_error':
-                print(f"❌ Error scanning repository: {result['error']}")
-            elif result['error_type'] == 'processing_error':
-                print(f"❌ Error initializing vector store: {result['error']}")
-                if 'traceback' in result:
-                    print()
-                    print("Full error traceback:")
-                    print(result['traceback'])
-            else:
-                print(f"❌ Error: {result['error']}")
-
-            print()
-            print("=" * 60)
-            sys.exit(1)
-
-        # Success - display detailed information
-        print(f"📁 Created directory")
-        if result.get('store_existed'):
-            print(f"🗑️  Removed existing database")
-        print(f"🔌 Connected to Milvus Lite")
-        print(f"📋 Created collection schema")
-        print(f"🗃️  Created collection: {result['collection_name']}")
-        print(f"🔍 Created index for vector search")
-        print(f"✅ Collection created successfully!")
-        print()
-
-        print(f"📂 Scanned repository for supported files")
-        print(f"   Found {result['files_scanned']} supported file(s)")
-        print()
-
-        if result['files_scanned'] > 0:
-            print(f"📝 Processed files and created chunks")
-            print(f"   Processed {result['files_processed']}/{result['files_scanned']} files")
-            print()
-
-            if result['chunks_stored'] > 0:
-                print(f"💾 Inserted {result['chunks_stored']} chunks into vector store")
-                print(f"   ✓ All chunks inserted successfully")
-            else:
-                print(f"⚠️  No chunks created (all files might be empty)")
-
-            # Show processing errors if any
-            if result.get('processing_errors'):
-                print()
-                print(f"⚠️  Encountered {len(result['processing_errors'])} file processing errors:")
-                for file_path, error in result['processing_errors'][:5]:  # Show first 5
-                    print(f"   - {file_path}: {error}")
-                if len(result['processing_errors']) > 5:
-                    print(f"   ... and {len(result['processing_errors']) - 5} more")
-
-        print()
-        print(f"✅ Vector store initialized and populated!")
-        print()
-        print(f"📊 Final Statistics:")
-        print(f"   Database Path: {result['db_path']}")
-        print(f"   Collection: {result['collection_name']}")
-        print(f"   Files scanned: {result['files_scanned']}")
-        print(f"   Files processed: {result['files_processed']}")
-        print(f"   Chunks stored: {result['chunks_stored']}")
-        print(f"   Embedding Dimension: {result['embedding_dim']}")
-        print()
-        print(f"💡 Next Steps:")
-        print(f"   1. Generate actual embeddings for the chunks")
-        print(f"   2. Use the store for semantic code/document search")
-        print()
-        print("=" * 60)
-        sys.exit(0)
-
-    elif args.update:
-        # Update store
-        print("🔄 Updating vector store...")
-        print()
-
-        result = update_vector_store(str(repo_path))
-
-        if not result['success']:
-            # Handle different error types
-            if result['error_type'] == 'validation':
-                print(f"❌ Error: {result['error']}")
-            elif result['error_type'] == 'git_error':
-                print(f"❌ Git error: {result['error']}")
-            elif result['error_type'] == 'processing_error':
-                print(f"❌ Error updating vector store: {result['error']}")
-                if 'traceback' in result:
-                    print()
-                    print("Full error traceback:")
-                    print(result['traceback'])
-            else:
-                print(f"❌ Error: {result['error']}")
-
-            print()
-            print("=" * 60)
-            sys.exit(1)
-
-        # Success - display detailed information
-        print(f"📊 Comparing commits...")
-        print(f"   Old commit: {result['old_sha'][:8]}")
-        print(f"   New commit: {result['new_sha'][:8]}")
-        print()
-
-        if result['changed_files'] == 0:
-            print(f"✅ {result.get('message', 'No changes detected')}")
-        else:
-            print(f"📂 Found {result['changed_files']} changed file(s)")
-            print(f"   Processed {result['processed_files']} supported file(s)")
-            print()
-
-            print(f"🗑️  Deleted {result['chunks_deleted']} old chunk(s)")
-            print(f"➕ Added {result['chunks_added']} new chunk(s)")
-
-            # Show processing errors if any
-            if result.get('processing_errors'):
-                print()
-                print(f"⚠️  Encountered {len(result['processing_errors'])} file processing errors:")
-                for file_path, error in result['processing_errors'][:5]:  # Show first 5
-                    print(f"   - {file_path}: {error}")
-                if len(result['processing_errors']) > 5:
-                    print(f"   ... and {len(result['processing_errors']) - 5} more")
-
-            print()
-            print(f"✅ Vector store updated successfully!")
-
-        print()
-        print(f"📊 Update Statistics:")
-        print(f"   Old SHA: {result['old_sha']}")
-        print(f"   New SHA: {result['new_sha']}")
-        print(f"   Changed files: {result['changed_files']}")
-        print(f"   Processed files: {result['processed_files']}")
-        print(f"   Chunks deleted: {result['chunks_deleted']}")
-        print(f"   Chunks added: {result['chunks_added']}")
-        print()
-        print("=" * 60)
-        sys.exit(0)
+    ACTION_HANDLERS[actions[0]](repo_path, args)
 
 
 if __name__ == '__main__':
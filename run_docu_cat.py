@@ -5,41 +5,57 @@ DocuCat - Local execution entry point (Version 2)
 Analyzes recent commits in a repository and detects changed files using LangGraph workflow.
 """
 
+import os
 import sys
 import argparse
-from pathlib import Path
+from functools import cache
 from typing import Optional
 from dotenv import load_dotenv
-
-from agents.utils import getResultFromState
+import uuid
 
 # Load environment variables from .env file
 load_dotenv()
 
-from agents.docu_cat_local import agent_docu_cat_local, agent_docu_cat_local_no_embedding
-from langchain_core.messages import AIMessage
-from langfuse.langchain import CallbackHandler
-import uuid
+
+# Usage examples shown at the end of the --help output
+EPILOG = """
+Examples:
+  # Analyze last 5 commits in current directory
+  docu-cat2 --count 5
+
+  # Analyze last 10 commits in a specific repository
+  docu-cat2 --path /path/to/repo --count 10
+
+  # Analyze last commit in another repository
+  docu-cat2 -p ../other-repo -c 1
+"""
 
 
-langfuse_handler = CallbackHandler()
 langfuse_session_id = uuid.uuid4()
 
+@cache
+def get_langfuse_handler():
+    """Create the Langfuse callback handler shared by all runs in this process."""
+    from langfuse.langchain import CallbackHandler
+    return CallbackHandler()
+
 def run_docu_cat(repo_path: str, count: int = 1, with_embedding: bool = True):
+    # The agents package compiles the LangGraph workflows when imported, so it is
+    # only loaded once there is something to run, after the arguments are parsed
+    from agents.docu_cat_local import create_workflow
+    from agents.utils import getResultFromState, print_banner, print_result
+
     # Convert to absolute path
-    repo_path = Path(repo_path).resolve()
+    repo_path = os.path.realpath(repo_path)
 
-    print("=" * 60)
-    print("DocuCat - Local Mode")
-    print("=" * 60)
-    print()
+    print_banner("DocuCat - Local Mode")
     print(f"📂 Repository: {repo_path}")
     print(f"📊 Analyzing last {count} commit(s)")
     print()
 
     # Create initial state for the workflow
     initial_state = {
-        "repo_path": str(repo_path),
+        "repo_path": repo_path,
         "commit_count": count,
         "changed_files": [],
         "messages": [],
@@ -47,84 +63,39 @@ def run_docu_cat(repo_path: str, count: int = 1, with_embedding: bool = True):
 
     try:
         # Run the LangGraph workflow
-        print("=" * 60)
-        print("Running DocuCat workflow...")
-        print("=" * 60)
-        print()
+        print_banner("Running DocuCat workflow...")
         print(f"Calling the agent with Langfuse session ID: {str(langfuse_session_id)}")
-        agent = agent_docu_cat_local if with_embedding else agent_docu_cat_local_no_embedding
-        state = agent.invoke(initial_state, config={"callbacks": [langfuse_handler], "metadata": {"langfuse_session_id": str(langfuse_session_id)}, "recursion_limit":50})
+        agent = create_workflow(with_embedding=with_embedding)
+        state = agent.invoke(initial_state, config={"callbacks": [get_langfuse_handler()], "metadata": {"langfuse_session_id": str(langfuse_session_id)}, "recursion_limit":50})
 
-        # Extract results from the agent's state
+        # Extract results from the agent's state and print them
         result = getResultFromState(state)
-        changed_files = result.get("changed_files")
-        analysis = result.get("analysis")
-        documents_updated = result.get("documents_updated")
-
-        # Print changed files
-        if changed_files:
-            print(f"\n✅ Found {len(changed_files)} changed file(s):\n")
-            for i, file_path in enumerate(changed_files, 1):
-                print(f"  {i}. {file_path}")
-            print()
-        else:
-            print("\n📝 No changed files detected.\n")
-
-        # Analyze and display results
-        if changed_files:
-            print("=" * 60)
-            print("🤖 Analysis Results")
-            print("   (Claude Haiku 4.5 via OpenRouter)")
-            print("=" * 60)
-            print()
-
-            if analysis:
-                print("📊 Analysis:")
-                print("-" * 60)
-                print(analysis)
-                print()
-
-                # Check for updates
-                if "NO_UPDATES_NEEDED" in analysis:
-                    print("✅ No documents needed updates.")
-                else:
-                    if documents_updated:
-                        print("📝 Documents Updated:")
-                        print("-" * 60)
-                        for doc in documents_updated:
-                            print(f"  ✓ {doc}")
-                    else:
-                        print("ℹ️  No documents were updated.")
-                print()
-        elif not changed_files:
-            print("ℹ️  No changes to analyze.\n")
+        print_result(result)
 
     except Exception as e:
         print(f"L Error running workflow: {e}", file=sys.stderr)
         import traceback
         traceback.print_exc()
-        sys.exit(1)
+        # Raised rather than exiting, so that callers running several analyses
+        # in worker threads see the failure of this one
+        raise
 
     print("=" * 60)
 
     return result
 
-def main(_repo_path: Optional[str] = None):
-    """Main entry point for local DocuCat execution using LangGraph workflow."""
+@cache
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the command-line parser, once per process.
+
+    Returns:
+        argparse.ArgumentParser: Parser of the local mode command-line arguments
+    """
     parser = argparse.ArgumentParser(
         description='DocuCat - Analyze recent commits and detect changed files',
         formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-Examples:
-  # Analyze last 5 commits in current directory
-  docu-cat2 --count 5
-
-  # Analyze last 10 commits in a specific repository
-  docu-cat2 --path /path/to/repo --count 10
-
-  # Analyze last commit in another repository
-  docu-cat2 -p ../other-repo -c 1
-        """
+        epilog=EPILOG
     )
 
     parser.add_argument(
@@ -141,9 +112,17 @@ Examples:
         help='Number of recent commits to analyze (default: 1)'
     )
 
+    return parser
+
+def main(_repo_path: Optional[str] = None):
+    """Main entry point for local DocuCat execution using LangGraph workflow."""
+    parser = build_parser()
     args = parser.parse_args()
 
-    return run_docu_cat(args.path, args.count)
+    try:
+        return run_docu_cat(args.path, args.count)
+    except Exception:
+        sys.exit(1)
 
 
 if __name__ == '__main__':
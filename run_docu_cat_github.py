@@ -1,7 +1,5 @@
 import os
 import sys
-from agents import agent_docu_cat_github
-from agents.utils import getResultFromState
 
 
 def main():
@@ -12,10 +10,16 @@ def main():
     base_sha = os.getenv('BASE_SHA')
     head_sha = os.getenv('HEAD_SHA')
 
-    print("=" * 60)
-    print("DocuCat - GitHub Mode")
-    print("=" * 60)
-    print()
+    # Without a PR number or a pair of SHAs there are no changed files to analyze.
+    # This is checked before importing the agents package, which compiles the workflows.
+    if not pr_number and not (base_sha and head_sha):
+        print("ℹ️  Skipping DocuCat: neither PR_NUMBER nor BASE_SHA and HEAD_SHA are set, so there are no changes to analyze")
+        sys.exit(0)
+
+    from agents import agent_docu_cat_github
+    from agents.utils import getResultFromState, print_banner, print_result
+
+    print_banner("DocuCat - GitHub Mode")
     print(f"📂 Repository: {repository}")
     print(f"📊 Pull Request: {pr_number}")
     print(f"📊 Base SHA: {base_sha}")
@@ -36,49 +40,9 @@ def main():
     try:
         state = agent_docu_cat_github.invoke(initial_state, config={"recursion_limit":50})
 
-        # Extract results from the agent's state
+        # Extract results from the agent's state and print them
         result = getResultFromState(state)
-        changed_files = result.get("changed_files")
-        analysis = result.get("analysis")
-        documents_updated = result.get("documents_updated")
-
-        # Print changed files
-        if changed_files:
-            print(f"\n✅ Found {len(changed_files)} changed file(s):\n")
-            for i, file_path in enumerate(changed_files, 1):
-                print(f"  {i}. {file_path}")
-            print()
-        else:
-            print("\n📝 No changed files detected.\n")
-
-        # Analyze and display results
-        if changed_files:
-            print("=" * 60)
-            print("🤖 Analysis Results")
-            print("   (Claude Haiku 4.5 via OpenRouter)")
-            print("=" * 60)
-            print()
-
-            if analysis:
-                print("📊 Analysis:")
-                print("-" * 60)
-                print(analysis)
-                print()
-
-                # Check for updates
-                if "NO_UPDATES_NEEDED" in analysis:
-                    print("✅ No documents needed updates.")
-                else:
-                    if documents_updated:
-                        print("📝 Documents Updated:")
-                        print("-" * 60)
-                        for doc in documents_updated:
-                            print(f"  ✓ {doc}")
-                    else:
-                        print("ℹ️  No documents were updated.")
-                print()
-        elif not changed_files:
-            print("ℹ️  No changes to analyze.\n")
+        print_result(result)
     except Exception as e:
         print(f"L Error running workflow: {e}", file=sys.stderr)
         import traceback
@@ -1,6 +1,12 @@
+import io
 import os
+import sys
+import asyncio
 import argparse
+import threading
 import subprocess
+from collections import defaultdict
+from contextvars import ContextVar
 from langfuse import Evaluation, get_client
 from run_docu_cat import run_docu_cat
 from experiment import calculate_f1_score
@@ -12,6 +18,44 @@ LOCAL_DATASET = [
   {"input": {"repo": "docu-cat-dataset-next-js", "branch": "test-case-text-button", "commit_count": 1, "with_embedding": False}, "expected_output": {"documents_updated": ["components/TextButton.tsx", "docs/COMPONENTS.md"], "analysis":"1. **components/TextButton.tsx**\n   - **Change**: Removed the TODO comment that said \"A better implementation is to use the DocuCatButton component as a base and set the variant to 'text'. But here we leave it as a future improvement.\"\n\n2. **docs/COMPONENTS.md**\n   - **Changes to DocuCatButton section**:\n     - Updated description to mention \"three variants\" instead of \"two variants\"\n     - Added documentation for the new `text` variant: \"Text-styled button that looks like a clickable link with underline on hover\"\n     - Added example usage of the `text` variant in the code snippet\n   \n   - **Changes to TextButton section**:\n     - Updated description to clarify that TextButton is \"Built on top of DocuCatButton with `variant=\"text\"`\"\n     - Removed the misleading note \"No `variant` prop\" since TextButton now internally uses the `variant` prop\n     - Updated description to better reflect the refactoring"}},
 ]
 
+# Maximum number of dataset items run at the same time
+MAX_CONCURRENT_ITEMS = int(os.getenv('DOCUCAT_EXPERIMENT_CONCURRENCY', '4'))
+
+# Output buffer of the item running in the current context. LangGraph copies the
+# context into its worker threads, so the output of an item's nodes lands there too
+item_output: ContextVar[io.StringIO | None] = ContextVar('item_output', default=None)
+
+class ItemOutputStream(io.TextIOBase):
+  """Stream writing to the output buffer of the current item, or to the wrapped stream outside of items."""
+
+  def __init__(self, stream):
+    self.stream = stream
+
+  @property
+  def encoding(self):
+    return self.stream.encoding
+
+  @property
+  def errors(self):
+    return self.stream.errors
+
+  def isatty(self):
+    return self.stream.isatty()
+
+  def fileno(self):
+    return self.stream.fileno()
+
+  def writable(self):
+    return True
+
+  def write(self, text):
+    buffer = item_output.get()
+    return (buffer if buffer is not None else self.stream).write(text)
+
+  def flush(self):
+    if item_output.get() is None:
+      self.stream.flush()
+
 def main():
   parser = argparse.ArgumentParser(
     description='Run DocuCat experiment with evaluation'
@@ -34,29 +78,61 @@ def main():
 
   langfuse = get_client()
 
-  def task(*, item, **kwargs):
+  # Resolve the directory of the repositories once rather than for every item
+  repos_dir = os.path.realpath(args.path)
+
+  # Items of the same repository check out their branch in the same working tree,
+  # so they take turns, while items of different repositories run concurrently.
+  # Every item of LOCAL_DATASET uses the same repository, so --local runs its
+  # items one after another; only datasets spanning several repositories overlap
+  repo_locks = defaultdict(threading.Lock)
+
+  # Each item's output is buffered and written out in one piece when the item
+  # finishes, so that items running concurrently do not interleave
+  stdout, stderr = sys.stdout, sys.stderr
+  output_lock = threading.Lock()
+
+  def run_item(input, repo_path, repo_lock):
+    buffer = io.StringIO()
+    item_output.set(buffer)
     try:
-      input = item["input"]
-    except:
-      input = item.input
-    
-    repo_path = os.path.join(args.path, input["repo"])
+      return run_checked_out_item(input, repo_path, repo_lock)
+    finally:
+      item_output.set(None)
+      with output_lock:
+        stdout.write(buffer.getvalue())
+        stdout.flush()
+
+  def run_checked_out_item(input, repo_path, repo_lock):
     branch = input["branch"]
     commit_count = input["commit_count"]
     with_embedding = input["with_embedding"]
 
-    # Disgard all changes in the repository
-    subprocess.run(['git', 'checkout', '--', '.'], cwd=repo_path, check=True)
-    # Checkout the target branch
-    subprocess.run(
-      ['git', 'checkout', branch],
-      cwd=repo_path,
-      check=True,
-      capture_output=True,
-      text=True
-    )
+    with repo_lock:
+      # Disgard all changes in the repository
+      subprocess.run(['git', 'checkout', '--', '.'], cwd=repo_path, check=True)
+      # Checkout the target branch
+      subprocess.run(
+        ['git', 'checkout', branch],
+        cwd=repo_path,
+        check=True,
+        capture_output=True,
+        text=True
+      )
+
+      return run_docu_cat(repo_path, commit_count, with_embedding)
+
+  async def task(*, item, **kwargs):
+    try:
+      input = item["input"]
+    except:
+      input = item.input
 
-    return run_docu_cat(repo_path, commit_count, with_embedding)
+    repo_path = os.path.join(repos_dir, input["repo"])
+
+    # An item spends seconds waiting for the LLM, so it runs in a worker thread
+    # and the experiment can start other items meanwhile
+    return await asyncio.to_thread(run_item, input, repo_path, repo_locks[repo_path])
 
   def evaluator(*, input, output, expected_output, metadata, **kwargs):
     result = output
@@ -69,22 +145,28 @@ def main():
     )
 
 
-  if args.local:
-    result = langfuse.run_experiment(
-      name="DocuCat Experiment",
-      description="Testing DocuCat on local data",
-      data=LOCAL_DATASET,
-      task=task,
-      evaluators=[evaluator],
-    )
-  else:
-    dataset = langfuse.get_dataset("default")
-    result = dataset.run_experiment(
-      name="DocuCat Experiment",
-      description="Testing DocuCat on local data",
-      task=task,
-      evaluators=[evaluator],
-    )
+  sys.stdout, sys.stderr = ItemOutputStream(stdout), ItemOutputStream(stderr)
+  try:
+    if args.local:
+      result = langfuse.run_experiment(
+        name="DocuCat Experiment",
+        description="Testing DocuCat on local data",
+        data=LOCAL_DATASET,
+        task=task,
+        evaluators=[evaluator],
+        max_concurrency=MAX_CONCURRENT_ITEMS,
+      )
+    else:
+      dataset = langfuse.get_dataset("default")
+      result = dataset.run_experiment(
+        name="DocuCat Experiment",
+        description="Testing DocuCat on local data",
+        task=task,
+        evaluators=[evaluator],
+        max_concurrency=MAX_CONCURRENT_ITEMS,
+      )
+  finally:
+    sys.stdout, sys.stderr = stdout, stderr
 
   print(result.format())
 
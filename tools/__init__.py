@@ -2,6 +2,7 @@ from .run_command import run_command
 from .read_file import read_file
 from .write_file import write_file
 from .query_vector_store import query_vector_store
+from .query_vector_store_batch import query_vector_store_batch
 
 
-__all__ = ["run_command", "read_file", "write_file", "query_vector_store"]
+__all__ = ["run_command", "read_file", "write_file", "query_vector_store", "query_vector_store_batch"]
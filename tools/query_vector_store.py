@@ -8,10 +8,129 @@ the agent to retrieve contextual information when analyzing changes.
 
 import os
 from typing import Optional
-from pathlib import Path
 from langchain_core.tools import tool
-from pymilvus import connections, Collection
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+
+def fit_embedding_dim(embedding: list[float], dim: int) -> list[float]:
+    """
+    Pad or truncate an embedding to the dimension of the vector store.
+
+    Args:
+        embedding: Embedding returned by the model
+        dim: Dimension of the vector store
+
+    Returns:
+        The embedding with exactly `dim` values
+    """
+    if len(embedding) < dim:
+        return embedding + [0.0] * (dim - len(embedding))
+    return embedding[:dim]
+
+
+def format_hits(hits) -> str:
+    """
+    Format the hits of a vector store search for the agent.
+
+    Args:
+        hits: Hits of one query of a Milvus search
+
+    Returns:
+        String containing the chunks with their file paths and content
+    """
+    if len(hits) == 0:
+        return "No relevant chunks found in the vector store."
+
+    formatted_results = []
+    formatted_results.append(f"Found {len(hits)} relevant chunks:\n")
+
+    for idx, hit in enumerate(hits, 1):
+        file_path = hit.entity.get("file_path")
+        content = hit.entity.get("content")
+        file_type = hit.entity.get("file_type")
+        distance = hit.distance
+
+        formatted_results.append(f"\n--- Result {idx} ---")
+        formatted_results.append(f"File: {file_path} ({file_type})")
+        formatted_results.append(f"Relevance score: {1.0 / (1.0 + distance):.3f}")
+        formatted_results.append(f"Content:\n{content}")
+
+    return "\n".join(formatted_results)
+
+
+def search_vector_store(queries: list[str], repo_path: str, top_k: int) -> tuple[list, Optional[str]]:
+    """
+    Search the local vector store for the chunks most similar to each query.
+
+    All queries are embedded with a single embedding request and searched with
+    a single Milvus search.
+
+    Args:
+        queries: The search queries
+        repo_path: Path to the repository
+        top_k: Number of results to return per query
+
+    Returns:
+        tuple: (hits of each query in query order, error message or None)
+    """
+    # Milvus and the Gemini client are slow to import, so they are only
+    # loaded when the agent actually queries the vector store
+    from pymilvus import connections, Collection
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    from vector_store import get_milvus_db_path, DEFAULT_COLLECTION_NAME, EMBEDDING_DIM
+
+    repo_path = os.path.realpath(repo_path)
+    milvus_db_path = get_milvus_db_path(repo_path)
+
+    # Check if vector store exists
+    if not milvus_db_path.exists():
+        return [], f"Error: Vector store not found at {repo_path}/.docucat. Please initialize it first with 'rag --init'."
+
+    # Get API key
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        return [], "Error: GEMINI_API_KEY environment variable is not set"
+
+    # Create embeddings model for queries
+    embeddings_model = GoogleGenerativeAIEmbeddings(
+        model="models/gemini-embedding-001",
+        task_type="RETRIEVAL_QUERY",
+        google_api_key=api_key,
+    )
+
+    # Generate the embeddings of all queries in one request
+    query_embeddings = embeddings_model.embed_documents(queries, task_type="RETRIEVAL_QUERY")
+
+    # Ensure correct dimensionality
+    query_embeddings = [fit_embedding_dim(embedding, EMBEDDING_DIM) for embedding in query_embeddings]
+
+    # Connect to Milvus
+    connections.connect(
+        alias="default",
+        uri=str(milvus_db_path)
+    )
+
+    # Get collection
+    collection = Collection(DEFAULT_COLLECTION_NAME)
+    collection.load()
+
+    # Search for similar chunks of all queries at once
+    search_params = {
+        "metric_type": "L2",
+        "params": {}
+    }
+
+    results = collection.search(
+        data=query_embeddings,
+        anns_field="embedding",
+        param=search_params,
+        limit=top_k,
+        output_fields=["file_path", "content", "file_type"]
+    )
+
+    # Disconnect
+    connections.disconnect("default")
+
+    return list(results), None
 
 
 @tool
@@ -33,85 +152,12 @@ def query_vector_store(query: str, repo_path: str = ".", top_k: int = 10) -> str
     """
     print(f"🔍 Querying vector store for query: {query}")
     try:
-        from vector_store import get_milvus_db_path, DEFAULT_COLLECTION_NAME, EMBEDDING_DIM
-        
-        repo_path = Path(repo_path).resolve()
-        milvus_db_path = get_milvus_db_path(str(repo_path))
-        
-        # Check if vector store exists
-        if not milvus_db_path.exists():
-            return f"Error: Vector store not found at {repo_path}/.docucat. Please initialize it first with 'rag --init'."
-        
-        # Get API key
-        api_key = os.environ.get("GEMINI_API_KEY")
-        if not api_key:
-            return "Error: GEMINI_API_KEY environment variable is not set"
-        
-        # Create embeddings model for queries
-        embeddings_model = GoogleGenerativeAIEmbeddings(
-            model="models/gemini-embedding-001",
-            task_type="RETRIEVAL_QUERY",
-            google_api_key=api_key,
-        )
-        
-        # Generate embedding for the query
-        query_embedding = embeddings_model.embed_query(query)
-        
-        # Ensure correct dimensionality
-        if len(query_embedding) != EMBEDDING_DIM:
-            # Pad or truncate if needed
-            if len(query_embedding) < EMBEDDING_DIM:
-                query_embedding = query_embedding + [0.0] * (EMBEDDING_DIM - len(query_embedding))
-            else:
-                query_embedding = query_embedding[:EMBEDDING_DIM]
-        
-        # Connect to Milvus
-        connections.connect(
-            alias="default",
-            uri=str(milvus_db_path)
-        )
-        
-        # Get collection
-        collection = Collection(DEFAULT_COLLECTION_NAME)
-        collection.load()
-        
-        # Search for similar chunks
-        search_params = {
-            "metric_type": "L2",
-            "params": {}
-        }
-        
-        results = collection.search(
-            data=[query_embedding],
-            anns_field="embedding",
-            param=search_params,
-            limit=top_k,
-            output_fields=["file_path", "content", "file_type"]
-        )
-
-        # Disconnect
-        connections.disconnect("default")
-        
+        results, error = search_vector_store([query], repo_path, top_k)
+        if error:
+            return error
+
         # Format results
-        if not results or len(results[0]) == 0:
-            return "No relevant chunks found in the vector store."
-        
-        formatted_results = []
-        formatted_results.append(f"Found {len(results[0])} relevant chunks:\n")
-        
-        for idx, hit in enumerate(results[0], 1):
-            file_path = hit.entity.get("file_path")
-            content = hit.entity.get("content")
-            file_type = hit.entity.get("file_type")
-            distance = hit.distance
-            
-            formatted_results.append(f"\n--- Result {idx} ---")
-            formatted_results.append(f"File: {file_path} ({file_type})")
-            formatted_results.append(f"Relevance score: {1.0 / (1.0 + distance):.3f}")
-            formatted_results.append(f"Content:\n{content}")
-        
-        return "\n".join(formatted_results)
+        return format_hits(results[0] if results else [])
         
     except Exception as e:
         return f"Error querying vector store: {str(e)}"
-
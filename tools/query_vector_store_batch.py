@@ -0,0 +1,47 @@
+"""
+Batched vector store query tool for the AI agent.
+
+This module provides a LangChain tool that runs several vector store queries
+at once. All queries are embedded with a single embedding request and searched
+with a single Milvus search, so the agent can gather context on several topics
+in one tool call instead of one round-trip per topic.
+"""
+
+from langchain_core.tools import tool
+from tools.query_vector_store import format_hits, search_vector_store
+
+
+@tool
+def query_vector_store_batch(queries: list[str], repo_path: str = ".", top_k: int = 5) -> str:
+    """
+    Query the local vector store with several queries at once.
+
+    Prefer this over query_vector_store when you need context on more than one topic.
+
+    Args:
+        queries: The search queries (e.g., ["authentication logic", "API endpoints"])
+        repo_path: Path to the repository (default: current directory)
+        top_k: Number of results to return per query (default: 5)
+
+    Returns:
+        String containing relevant chunks for each query with their file paths and content,
+        or error message if query fails
+    """
+    print(f"🔍 Querying vector store for {len(queries)} queries: {queries}")
+    if not queries:
+        return "Error: No queries provided"
+
+    try:
+        results, error = search_vector_store(queries, repo_path, top_k)
+        if error:
+            return error
+
+        # Format results, one section per query
+        sections = []
+        for query, hits in zip(queries, results):
+            sections.append(f"=== Query: {query} ===\n{format_hits(hits)}")
+
+        return "\n\n".join(sections)
+
+    except Exception as e:
+        return f"Error querying vector store: {str(e)}"
@@ -12,10 +12,96 @@ The tool is designed with safety features including timeouts and error handling
 to prevent runaway commands from affecting the system.
 """
 
+import os
+import stat
 import subprocess
 from langchain_core.tools import tool
 
 
+# Characters that only a shell can interpret
+SHELL_SPECIAL_CHARACTERS = set('|&;<>()$`\\"\'*?[]{}~#!\n')
+
+# Commands that only exist as shell builtins
+SHELL_BUILTINS = {'cd', 'export', 'source', '.', 'set', 'unset', 'alias', 'type', 'ulimit', 'umask'}
+
+# Maximum size of the output returned to the agent
+MAX_OUTPUT_BYTES = 64 * 1024
+
+
+def split_command(command: str) -> list[str] | None:
+    """
+    Split a command into arguments if it can run without a shell.
+
+    Args:
+        command: The shell command requested by the agent
+
+    Returns:
+        The command arguments, or None if the command needs a shell
+    """
+    if any(char in SHELL_SPECIAL_CHARACTERS for char in command):
+        return None
+
+    args = command.split()
+    if not args or args[0] in SHELL_BUILTINS or '=' in args[0]:
+        return None
+    return args
+
+
+def read_files_in_process(args: list[str], working_dir: str) -> bytes | None:
+    """
+    Run a plain `cat <file> ...` command without starting a process.
+
+    Only regular files are read, and no more than MAX_OUTPUT_BYTES + 1 bytes in
+    total, which is enough for decode_output to tell that it must truncate.
+
+    Args:
+        args: The command arguments
+        working_dir: Working directory for command execution
+
+    Returns:
+        The concatenated file contents, or None if the command must be executed
+    """
+    if len(args) < 2 or args[0] != 'cat' or any(arg.startswith('-') for arg in args[1:]):
+        return None
+
+    filepaths = [os.path.join(working_dir, filepath) for filepath in args[1:]]
+    try:
+        # Devices and FIFOs may never end, so they are left to cat and its timeout
+        if not all(stat.S_ISREG(os.stat(filepath).st_mode) for filepath in filepaths):
+            return None
+
+        contents = []
+        remaining = MAX_OUTPUT_BYTES + 1
+        for filepath in filepaths:
+            with open(filepath, 'rb') as f:
+                content = f.read(remaining)
+            contents.append(content)
+            remaining -= len(content)
+            if remaining <= 0:
+                break
+    except OSError:
+        # Let cat report the error in its usual form
+        return None
+
+    return b"".join(contents)
+
+
+def decode_output(output: bytes) -> str:
+    """
+    Decode command output, truncated to MAX_OUTPUT_BYTES.
+
+    Args:
+        output: Raw command output
+
+    Returns:
+        The decoded output with surrounding whitespace removed
+    """
+    if len(output) > MAX_OUTPUT_BYTES:
+        text = output[:MAX_OUTPUT_BYTES].decode('utf-8', errors='replace').strip()
+        return f"{text}\n... (output truncated to {MAX_OUTPUT_BYTES} bytes)"
+    return output.decode('utf-8', errors='replace').strip()
+
+
 @tool
 def run_command(command: str, working_dir: str = ".") -> str:
     """
@@ -35,20 +121,28 @@ def run_command(command: str, working_dir: str = ".") -> str:
     print(f"🔧 Running command: {command}")
 
     try:
+        args = split_command(command)
+
+        # Reading files is the most common command, so it is served in process
+        output = read_files_in_process(args, working_dir) if args else None
+        if output is not None:
+            output = decode_output(output)
+            return output if output else "(command executed successfully, no output)"
+
+        # Only commands using shell syntax are run through a shell
         result = subprocess.run(
-            command,
-            shell=True,
+            args if args else command,
+            shell=not args,
             capture_output=True,
-            text=True,
             cwd=working_dir,
             timeout=30  # 30 second timeout for safety
         )
 
         if result.returncode == 0:
-            output = result.stdout.strip()
+            output = decode_output(result.stdout)
             return output if output else "(command executed successfully, no output)"
         else:
-            return f"Error (exit code {result.returncode}): {result.stderr.strip()}"
+            return f"Error (exit code {result.returncode}): {decode_output(result.stderr)}"
 
     except subprocess.TimeoutExpired:
         return "Error: Command timed out after 30 seconds"
@@ -7,6 +7,8 @@ Handles initialization and management of Milvus Lite vector database.
 import os
 import json
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, List, Dict
 from pymilvus import (
@@ -19,6 +21,7 @@ from pymilvus import (
 )
 from langchain_text_splitters import RecursiveCharacterTextSplitter, Language
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from vector_store_paths import get_vector_store_path, get_milvus_db_path, get_store_json_path
 
 
 # Default collection name for code and document embeddings
@@ -27,51 +30,17 @@ DEFAULT_COLLECTION_NAME = "docu_cat_embeddings"
 # Embedding dimension for Gemini
 EMBEDDING_DIM = 256
 
+# Number of chunks sent in one embedding request
+EMBED_BATCH_SIZE = 100
+
+# Number of embedding requests in flight at once
+EMBED_CONCURRENCY = int(os.getenv('DOCUCAT_EMBED_CONCURRENCY', '8'))
+
 # Directories to skip when scanning/processing files
 SKIP_DIRS = {'.git', '.docucat', '__pycache__', 'node_modules', '.venv', 'venv', 'env',
              '.pytest_cache', '.tox', 'dist', 'build', '.egg-info'}
 
 
-def get_vector_store_path(repo_path: str) -> Path:
-    """
-    Get the path to the vector store directory.
-
-    Args:
-        repo_path: Path to the repository
-
-    Returns:
-        Path: Path to the .docucat directory
-    """
-    repo_path = Path(repo_path).resolve()
-    return repo_path / ".docucat"
-
-
-def get_milvus_db_path(repo_path: str) -> Path:
-    """
-    Get the path to the Milvus database file.
-
-    Args:
-        repo_path: Path to the repository
-
-    Returns:
-        Path: Path to the Milvus database file
-    """
-    return get_vector_store_path(repo_path) / "milvus.db"
-
-
-def get_store_json_path(repo_path: str) -> Path:
-    """
-    Get the path to the store.json metadata file.
-
-    Args:
-        repo_path: Path to the repository
-
-    Returns:
-        Path: Path to the store.json file
-    """
-    return get_vector_store_path(repo_path) / "store.json"
-
-
 def get_current_git_sha(repo_path: Path) -> Optional[str]:
     """
     Get the full SHA of the current git commit.
@@ -145,9 +114,12 @@ def load_store_metadata(repo_path: Path) -> Optional[Dict]:
         return None
 
 
-def get_changed_files(repo_path: Path, old_sha: str, new_sha: str) -> tuple[List[str], Optional[str]]:
+def get_changed_files(repo_path: Path, old_sha: str, new_sha: str) -> tuple[Dict[str, str], Optional[str]]:
     """
-    Get list of files that changed between two commits.
+    Get the files that changed between two commits with their status.
+
+    Renames are reported as a deletion of the old path and an addition of the
+    new one, so that the chunks of the old path are removed.
 
     Args:
         repo_path: Path to the git repository
@@ -155,26 +127,27 @@ def get_changed_files(repo_path: Path, old_sha: str, new_sha: str) -> tuple[List
         new_sha: New commit SHA
 
     Returns:
-        tuple: (list of changed file paths relative to repo root, error message or None)
+        tuple: (changed file paths relative to repo root mapped to their status letter
+                from git, e.g. 'A', 'M' or 'D', error message or None)
     """
     try:
-        # Use git diff to get list of changed files
+        # Use git diff to get the status of each changed file, NUL-separated
         result = subprocess.run(
-            ["git", "diff", "--name-only", old_sha, new_sha],
+            ["git", "diff", "--name-status", "--no-renames", "-z", old_sha, new_sha],
             cwd=repo_path,
             capture_output=True,
-            text=True,
             check=True
         )
 
-        # Filter out empty lines
-        changed_files = [line.strip() for line in result.stdout.split('\n') if line.strip()]
+        # Output alternates between the status and the path of each file
+        fields = result.stdout.decode('utf-8', 'surrogateescape').split('\0')
+        changed_files = {path: status for status, path in zip(fields[0::2], fields[1::2]) if path}
 
         return changed_files, None
     except subprocess.CalledProcessError as e:
-        return [], f"Error getting changed files: {e.stderr}"
+        return {}, f"Error getting changed files: {e.stderr.decode(errors='replace')}"
     except Exception as e:
-        return [], f"Error getting changed files: {str(e)}"
+        return {}, f"Error getting changed files: {str(e)}"
 
 
 def delete_chunks_by_file_path(collection: Collection, file_path: str) -> tuple[int, Optional[str]]:
@@ -235,6 +208,33 @@ def create_embeddings_model():
     )
 
 
+def embed_chunks(embeddings_model, text_chunks: List[str]) -> List[List[float]]:
+    """
+    Generate the embeddings of text chunks with concurrent batched requests.
+
+    The chunks are split into batches of EMBED_BATCH_SIZE, and up to
+    EMBED_CONCURRENCY batches are embedded at the same time.
+
+    Args:
+        embeddings_model: Gemini embeddings model
+        text_chunks: Text chunks to embed
+
+    Returns:
+        List[List[float]]: Embeddings in the same order as the chunks
+    """
+    batches = [text_chunks[i:i + EMBED_BATCH_SIZE] for i in range(0, len(text_chunks), EMBED_BATCH_SIZE)]
+
+    def embed_batch(batch: List[str]) -> List[List[float]]:
+        return embeddings_model.embed_documents(
+            batch,
+            batch_size=EMBED_BATCH_SIZE,
+            output_dimensionality=EMBEDDING_DIM
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, min(EMBED_CONCURRENCY, len(batches)))) as executor:
+        return [embedding for embeddings in executor.map(embed_batch, batches) for embedding in embeddings]
+
+
 def get_supported_extensions() -> Dict[str, str]:
     """
     Get mapping of file extensions to file types supported by langchain_text_splitters.
@@ -318,24 +318,30 @@ def scan_repository_files(repo_path: Path) -> tuple[List[tuple], Optional[str]]:
     supported_files = []
 
     try:
-        for root, dirs, files in os.walk(repo_path):
-            # Filter out skip directories
-            dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith('.')]
-
-            root_path = Path(root)
-            for file in files:
-                file_path = root_path / file
-                file_ext = file_path.suffix.lower()
-
-                if file_ext in supported_extensions:
-                    # Get relative path from repo root
-                    try:
-                        relative_path = file_path.relative_to(repo_path)
-                        file_type = supported_extensions[file_ext]
-                        supported_files.append((str(relative_path), file_type, str(file_path)))
-                    except ValueError:
+        # Walk the tree with os.scandir, whose entries already know their type on
+        # most file systems, so that files need no extra stat call
+        root_prefix = os.path.join(str(repo_path), '')
+        pending_dirs = [root_prefix]
+        while pending_dirs:
+            try:
+                entries = os.scandir(pending_dirs.pop())
+            except OSError:
+                # Unreadable directories are skipped, as os.walk does
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        # Like os.walk, do not descend into symlinked directories
+                        if entry.name not in SKIP_DIRS and not entry.name.startswith('.') and not entry.is_symlink():
+                            pending_dirs.append(entry.path)
                         continue
 
+                    file_ext = os.path.splitext(entry.name)[1].lower()
+                    if file_ext in supported_extensions:
+                        # Get relative path from repo root
+                        relative_path = entry.path[len(root_prefix):]
+                        supported_files.append((relative_path, supported_extensions[file_ext], entry.path))
+
         return supported_files, None
 
     except Exception as e:
@@ -427,13 +433,14 @@ def split_file_into_chunks(file_path: str, file_type: str) -> tuple[List[str], O
         return [], f"Error splitting file {file_path}: {e}"
 
 
-def initialize_vector_store(repo_path: str, force: bool = False) -> Dict:
+def initialize_vector_store(repo_path: str, force: bool = False, jobs: Optional[int] = None) -> Dict:
     """
     Initialize an empty Milvus Lite vector store.
 
     Args:
         repo_path: Path to the target repository
         force: If True, recreate the store even if it exists
+        jobs: Number of files read and split concurrently (default: chosen from the CPU count)
 
     Returns:
         dict: Result containing 'success' (bool), and additional data or error message
@@ -445,6 +452,7 @@ def initialize_vector_store(repo_path: str, force: bool = False) -> Dict:
                   'files_processed': int,
                   'chunks_stored': int,
                   'embedding_dim': int,
+                  'embed_seconds': float,
                   'store_existed': bool
               }
               On failure: {
@@ -602,6 +610,7 @@ def initialize_vector_store(repo_path: str, force: bool = False) -> Dict:
         # Process files and insert chunks
         total_chunks = 0
         files_processed = 0
+        embed_seconds = 0.0
         processing_errors = []
 
         # Initialize embeddings model
@@ -621,9 +630,14 @@ def initialize_vector_store(repo_path: str, force: bool = False) -> Dict:
         file_types = []
         text_chunks = []  # Store text for embedding generation
 
-        for relative_path, file_type, absolute_path in supported_files:
-            chunks, error = split_file_into_chunks(absolute_path, file_type)
+        # Read and split the files concurrently, collecting the chunks in scan order
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            split_results = list(executor.map(
+                lambda supported_file: split_file_into_chunks(supported_file[2], supported_file[1]),
+                supported_files
+            ))
 
+        for (relative_path, file_type, absolute_path), (chunks, error) in zip(supported_files, split_results):
             if error:
                 processing_errors.append((relative_path, error))
                 continue
@@ -641,11 +655,10 @@ def initialize_vector_store(repo_path: str, force: bool = False) -> Dict:
         if total_chunks > 0:
             # Generate embeddings for all chunks with specified dimensionality
             try:
-                embeddings = embeddings_model.embed_documents(
-                    text_chunks,
-                    output_dimensionality=EMBEDDING_DIM
-                )
-                
+                embed_start = time.perf_counter()
+                embeddings = embed_chunks(embeddings_model, text_chunks)
+                embed_seconds = time.perf_counter() - embed_start
+
                 # Ensure embeddings have the correct dimension
                 if embeddings and len(embeddings[0]) != EMBEDDING_DIM:
                     connections.disconnect("default")
@@ -688,6 +701,7 @@ def initialize_vector_store(repo_path: str, force: bool = False) -> Dict:
             'files_processed': files_processed,
             'chunks_stored': total_chunks,
             'embedding_dim': EMBEDDING_DIM,
+            'embed_seconds': embed_seconds,
             'store_existed': store_existed,
             'processing_errors': processing_errors if processing_errors else None
         }
@@ -703,12 +717,13 @@ def initialize_vector_store(repo_path: str, force: bool = False) -> Dict:
         }
 
 
-def update_vector_store(repo_path: str) -> Dict:
+def update_vector_store(repo_path: str, jobs: Optional[int] = None) -> Dict:
     """
     Update the vector store by processing only changed files since last update.
 
     Args:
         repo_path: Path to the target repository
+        jobs: Number of files read and split concurrently (default: chosen from the CPU count)
 
     Returns:
         dict: Result containing 'success' (bool), and additional data or error message
@@ -719,7 +734,8 @@ def update_vector_store(repo_path: str) -> Dict:
                   'changed_files': int,
                   'processed_files': int,
                   'chunks_deleted': int,
-                  'chunks_added': int
+                  'chunks_added': int,
+                  'retry_needed': bool
               }
               On failure: {
                   'success': False,
@@ -839,6 +855,15 @@ def update_vector_store(repo_path: str) -> Dict:
         processed_files = 0
         processing_errors = []
 
+        # Data of the new chunks, inserted once all changed files are split
+        files_to_embed = []
+        file_paths = []
+        contents = []
+        file_types = []
+        text_chunks = []
+
+        # Select the changed files that belong in the vector store
+        files_to_process = []
         for changed_file in changed_files:
             # Skip files in skip directories
             if should_skip_file(changed_file):
@@ -851,61 +876,106 @@ def update_vector_store(repo_path: str) -> Dict:
             if file_ext not in supported_extensions:
                 continue
 
-            file_type = supported_extensions[file_ext]
-            absolute_path = repo_path / changed_file
-
-            # Delete old chunks for this file
-            chunks_deleted, error = delete_chunks_by_file_path(collection, changed_file)
-            if error:
-                processing_errors.append((changed_file, error))
-                continue
-
-            total_chunks_deleted += chunks_deleted
+            files_to_process.append((changed_file, supported_extensions[file_ext]))
 
-            # If file still exists, add new chunks
-            if absolute_path.exists():
-                chunks, error = split_file_into_chunks(str(absolute_path), file_type)
+        def split_changed_file(file_to_process: tuple) -> Optional[tuple[List[str], Optional[str]]]:
+            changed_file, file_type = file_to_process
+            # Deleted files only need their old chunks removed
+            if changed_files[changed_file] == 'D':
+                return None
+            absolute_path = repo_path / changed_file
+            if not absolute_path.exists():
+                return None
+            return split_file_into_chunks(str(absolute_path), file_type)
+
+        # Read and split the files concurrently. The collection is only used from
+        # this thread, since the Milvus connection is not shared between threads.
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            split_results = list(executor.map(split_changed_file, files_to_process))
+
+        # Files whose old chunks are replaced. A file that fails to split fails the
+        # same way on every run, so its old chunks are removed like those of a deleted file.
+        files_to_replace = []
+        for (changed_file, file_type), split_result in zip(files_to_process, split_results):
+            # If file still exists, collect its new chunks
+            if split_result is not None:
+                chunks, error = split_result
 
                 if error:
                     processing_errors.append((changed_file, error))
+                    files_to_replace.append(changed_file)
                     continue
 
                 if chunks:
-                    # Prepare data for this file
-                    file_paths = [changed_file] * len(chunks)
-                    contents = [chunk[:65535] for chunk in chunks]
-                    file_types = [file_type] * len(chunks)
-
-                    # Generate embeddings
-                    try:
-                        embeddings = embeddings_model.embed_documents(
-                            chunks,
-                            output_dimensionality=EMBEDDING_DIM
-                        )
-
-                        # Insert chunks
-                        data = [
-                            file_paths,
-                            contents,
-                            file_types,
-                            embeddings
-                        ]
-
-                        collection.insert(data)
-                        collection.flush()
-
-                        total_chunks_added += len(chunks)
-                    except Exception as e:
-                        processing_errors.append((changed_file, f"Error generating embeddings: {str(e)}"))
-                        continue
+                    # Collect the chunks so that all files are embedded together
+                    files_to_embed.append(changed_file)
+                    file_paths.extend([changed_file] * len(chunks))
+                    contents.extend(chunk[:65535] for chunk in chunks)
+                    file_types.extend([file_type] * len(chunks))
+                    text_chunks.extend(chunks)
+
+            files_to_replace.append(changed_file)
+
+        # Generate embeddings for the chunks of all changed files in batched requests.
+        # This happens before any old chunk is deleted, so a failure leaves the store unchanged.
+        embeddings = []
+        retry_needed = False
+        if text_chunks:
+            try:
+                embeddings = embed_chunks(embeddings_model, text_chunks)
+            except Exception as e:
+                retry_needed = True
+                for changed_file in files_to_embed:
+                    processing_errors.append((changed_file, f"Error generating embeddings: {str(e)}"))
+                embedded_files = set(files_to_embed)
+                files_to_replace = [changed_file for changed_file in files_to_replace if changed_file not in embedded_files]
+                files_to_embed = []
+                text_chunks = []
+
+        # Delete old chunks of the replaced files
+        failed_files = set()
+        for changed_file in files_to_replace:
+            chunks_deleted, error = delete_chunks_by_file_path(collection, changed_file)
+            if error:
+                processing_errors.append((changed_file, error))
+                failed_files.add(changed_file)
+                retry_needed = True
+                continue
 
+            total_chunks_deleted += chunks_deleted
             processed_files += 1
 
+        # Insert the new chunks, except those of files whose old chunks could not be deleted
+        if text_chunks:
+            if failed_files:
+                kept = [index for index, file_path in enumerate(file_paths) if file_path not in failed_files]
+                file_paths = [file_paths[index] for index in kept]
+                contents = [contents[index] for index in kept]
+                file_types = [file_types[index] for index in kept]
+                embeddings = [embeddings[index] for index in kept]
+
+            if file_paths:
+                # Insert chunks
+                data = [
+                    file_paths,
+                    contents,
+                    file_types,
+                    embeddings
+                ]
+
+                collection.insert(data)
+                collection.flush()
+
+                total_chunks_added += len(file_paths)
+
         # Disconnect
         connections.disconnect("default")
 
-        # Update metadata with new SHA
-        save_store_metadata(repo_path, new_sha)
+        # Update metadata with new SHA. If embedding or deleting failed, which may
+        # succeed on retry, the SHA is kept so the next update retries the same range
+        # of commits. Files that cannot be split are only reported.
+        if not retry_needed:
+            save_store_metadata(repo_path, new_sha)
 
         return {
             'success': True,
@@ -915,7 +985,8 @@ def update_vector_store(repo_path: str) -> Dict:
             'processed_files': processed_files,
             'chunks_deleted': total_chunks_deleted,
             'chunks_added': total_chunks_added,
-            'processing_errors': processing_errors if processing_errors else None
+            'processing_errors': processing_errors if processing_errors else None,
+            'retry_needed': retry_needed
         }
 
     except Exception as e:
@@ -929,6 +1000,28 @@ def update_vector_store(repo_path: str) -> Dict:
         }
 
 
+def has_vector_store_collection(milvus_db_path: str) -> bool:
+    """
+    Check if a Milvus database contains the DocuCat collection.
+
+    Args:
+        milvus_db_path: Path to the Milvus database file
+
+    Returns:
+        bool: True if the collection exists, False otherwise
+    """
+    connections.connect(
+        alias="default",
+        uri=milvus_db_path
+    )
+
+    has_collection = utility.has_collection(DEFAULT_COLLECTION_NAME)
+
+    connections.disconnect("default")
+
+    return has_collection
+
+
 def check_vector_store(repo_path: str) -> bool:
     """
     Check if a vector store exists and is valid.
@@ -946,19 +1039,45 @@ def check_vector_store(repo_path: str) -> bool:
             return False
 
         # Try to connect and check collection
-        connections.connect(
-            alias="default",
-            uri=str(milvus_db_path)
-        )
+        return has_vector_store_collection(str(milvus_db_path))
 
-        has_collection = utility.has_collection(DEFAULT_COLLECTION_NAME)
+    except Exception:
+        return False
 
-        connections.disconnect("default")
 
-        return has_collection
+def read_store_info(milvus_db_path: str) -> dict:
+    """
+    Read information about a Milvus database.
 
-    except Exception:
-        return False
+    Args:
+        milvus_db_path: Path to the Milvus database file
+
+    Returns:
+        dict: Store information
+    """
+    # Connect to store
+    connections.connect(
+        alias="default",
+        uri=milvus_db_path
+    )
+
+    # Get collection
+    collection = Collection(DEFAULT_COLLECTION_NAME)
+
+    # Get stats
+    collection.load()
+    num_entities = collection.num_entities
+
+    info = {
+        "path": milvus_db_path,
+        "collection_name": DEFAULT_COLLECTION_NAME,
+        "num_documents": num_entities,
+        "embedding_dim": EMBEDDING_DIM,
+    }
+
+    connections.disconnect("default")
+
+    return info
 
 
 def get_store_info(repo_path: str) -> Optional[dict]:
@@ -977,29 +1096,7 @@ def get_store_info(repo_path: str) -> Optional[dict]:
 
         milvus_db_path = get_milvus_db_path(repo_path)
 
-        # Connect to store
-        connections.connect(
-            alias="default",
-            uri=str(milvus_db_path)
-        )
-
-        # Get collection
-        collection = Collection(DEFAULT_COLLECTION_NAME)
-
-        # Get stats
-        collection.load()
-        num_entities = collection.num_entities
-
-        info = {
-            "path": str(milvus_db_path),
-            "collection_name": DEFAULT_COLLECTION_NAME,
-            "num_documents": num_entities,
-            "embedding_dim": EMBEDDING_DIM,
-        }
-
-        connections.disconnect("default")
-
-        return info
+        return read_store_info(str(milvus_db_path))
 
     except Exception:
         return None
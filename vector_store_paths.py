@@ -0,0 +1,56 @@
+"""
+Vector Store Paths for DocuCat
+Locations of the vector store files inside a repository.
+
+This module has no heavy dependencies, so command-line tools can find the
+vector store without loading Milvus Lite and the Gemini client.
+"""
+
+import os
+from pathlib import Path
+
+
+# Directory and files of the vector store inside the repository
+VECTOR_STORE_DIR = ".docucat"
+MILVUS_DB_FILE = "milvus.db"
+STORE_JSON_FILE = "store.json"
+
+
+def get_vector_store_path(repo_path: str) -> Path:
+    """
+    Get the path to the vector store directory.
+
+    Args:
+        repo_path: Path to the repository
+
+    Returns:
+        Path: Path to the .docucat directory
+    """
+    # Callers resolve the repository path once, so only make it absolute here
+    return Path(os.path.abspath(repo_path), VECTOR_STORE_DIR)
+
+
+def get_milvus_db_path(repo_path: str) -> Path:
+    """
+    Get the path to the Milvus database file.
+
+    Args:
+        repo_path: Path to the repository
+
+    Returns:
+        Path: Path to the Milvus database file
+    """
+    return get_vector_store_path(repo_path) / MILVUS_DB_FILE
+
+
+def get_store_json_path(repo_path: str) -> Path:
+    """
+    Get the path to the store.json metadata file.
+
+    Args:
+        repo_path: Path to the repository
+
+    Returns:
+        Path: Path to the store.json file
+    """
+    return get_vector_store_path(repo_path) / STORE_JSON_FILE